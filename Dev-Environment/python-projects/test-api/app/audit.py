@@ -0,0 +1,402 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# seconds; 0.2 marks the latency KPI for critical operations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ACTOR_HEADER = b"x-actor"
+MAX_ROUTE_CACHE = 4096
+
+# (unix time, method, path, status, seconds, headers, client) captured per
+# request; everything else is worked out by the writer, off the hot path
+Event = Tuple[float, str, str, int, float, list, Optional[tuple]]
+
+
+class RingBuffer:
+    """Fixed-size event ring that makes producers wait instead of dropping.
+
+    Only touched from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, capacity: int, batch_size: int):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.waits = 0
+        self._slots: List[Optional[Event]] = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self._space = asyncio.Event()
+        self._space.set()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def put(self, event: Event) -> None:
+        while self._size == self.capacity:
+            # backpressure: hold the request until the writer frees a slot
+            self.waits += 1
+            self._space.clear()
+            await self._space.wait()
+        self._slots[(self._head + self._size) % self.capacity] = event
+        self._size += 1
+        if self._size >= self.batch_size:
+            self._ready.set()
+
+    async def wait(self, timeout: float) -> None:
+        """Return once a full batch is waiting, or after timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+
+    def wake(self) -> None:
+        self._ready.set()
+
+    def drain(self, limit: int) -> List[Event]:
+        count = min(limit, self._size)
+        events = []
+        for _ in range(count):
+            events.append(self._slots[self._head])
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+        self._size -= count
+        if count:
+            self._space.set()
+        return events
+
+
+class RotatingFile:
+    """Append-only file that is renamed aside once it reaches max_bytes.
+
+    Rotated files get a timestamp suffix and are never deleted or
+    rewritten; archiving them is left to the retention policy.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = None
+
+    def _open(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def _stale(self) -> bool:
+        # another worker may have rotated the file underneath us
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return current.st_ino != os.fstat(self._file.fileno()).st_ino
+
+    def _rotate(self) -> None:
+        self.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        target = "%s.%s" % (self.path, stamp)
+        suffix = 1
+        while os.path.exists(target):
+            target = "%s.%s.%d" % (self.path, stamp, suffix)
+            suffix += 1
+        os.replace(self.path, target)
+
+    def write(self, data: bytes) -> None:
+        if self._file is None or self._stale():
+            self.close()
+            self._open()
+        size = self._file.tell()
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+            self._open()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # one slot per bucket plus +Inf, made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class AuditLog:
+    """Buffers request events and writes them in batches from a background task.
+
+    Every request becomes one JSON line in the audit file and one
+    observation in the latency histograms served at /metrics.
+    """
+
+    def __init__(self):
+        self.buffer: Optional[RingBuffer] = None
+        self.file: Optional[RotatingFile] = None
+        self.routes: Sequence = ()
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self._templates: Dict[str, str] = {}
+        self._metrics_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.flush_interval = 1.0
+
+    async def start(self, settings: Settings, routes: Sequence = ()) -> None:
+        self.buffer = RingBuffer(settings.audit_buffer_size, settings.audit_batch_size)
+        self.file = RotatingFile(settings.log_file, settings.log_max_bytes)
+        self.flush_interval = settings.audit_flush_interval
+        self.routes = routes
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write out everything still buffered, then close the file."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self.buffer.wake()
+        await self._task
+        self._task = None
+        self.buffer = None
+        self.file.close()
+
+    async def record(self, event: Event) -> None:
+        buffer = self.buffer
+        # without a running lifespan there is no writer to hand events to
+        if buffer is not None:
+            await buffer.put(event)
+
+    async def _run(self) -> None:
+        buffer = self.buffer
+        while True:
+            if len(buffer) < buffer.batch_size and not self._stopping:
+                await buffer.wait(self.flush_interval)
+            batch = buffer.drain(buffer.batch_size)
+            if batch:
+                await self._flush(batch)
+            elif self._stopping:
+                return
+
+    async def _flush(self, batch: List[Event]) -> None:
+        # audit events are not dropped, a failing disk is retried until
+        # it recovers; backpressure holds new requests meanwhile
+        while True:
+            try:
+                await asyncio.to_thread(self._write, batch)
+                return
+            except OSError as exc:
+                self.write_errors += 1
+                if self._stopping:
+                    logger.error("audit log lost %d events: %s", len(batch), exc)
+                    return
+                logger.error("audit log write failed, retrying: %s", exc)
+                await asyncio.sleep(1)
+
+    def route(self, path: str) -> str:
+        """Route template for a path, so metrics stay low-cardinality."""
+        template = self._templates.get(path)
+        if template is None:
+            template = "unmatched"
+            for route in self.routes:
+                regex = getattr(route, "path_regex", None)
+                if regex is not None and regex.match(path):
+                    template = route.path_format
+                    break
+            if len(self._templates) >= MAX_ROUTE_CACHE:
+                self._templates.clear()
+            self._templates[path] = template
+        return template
+
+    def _write(self, batch: List[Event]) -> None:
+        lines = []
+        observed = []
+        for wall, method, path, status, seconds, headers, client in batch:
+            actor = "anonymous"
+            for name, value in headers:
+                if name == ACTOR_HEADER:
+                    actor = value.decode("latin-1")
+                    break
+            route = self.route(path)
+            observed.append((method, route, status, seconds))
+            # the query string is left out, it can carry PHI
+            lines.append(
+                json.dumps(
+                    {
+                        "ts": datetime.fromtimestamp(wall, timezone.utc).isoformat(
+                            timespec="milliseconds"
+                        ),
+                        "actor": actor,
+                        "client": client[0] if client else None,
+                        "method": method,
+                        "path": path,
+                        "route": route,
+                        "status": status,
+                        "duration_ms": round(seconds * 1000, 3),
+                    }
+                )
+            )
+        self.file.write(("\n".join(lines) + "\n").encode())
+
+        with self._metrics_lock:
+            for method, route, status, seconds in observed:
+                histogram = self.histograms.get((method, route))
+                if histogram is None:
+                    histogram = self.histograms[(method, route)] = Histogram()
+                histogram.observe(seconds)
+                key = (method, route, status)
+                self.requests[key] = self.requests.get(key, 0) + 1
+            self.written += len(batch)
+            self.batches += 1
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of the request metrics.
+
+        Fed by the writer, so it trails live traffic by up to one flush
+        interval. Each uvicorn worker reports its own numbers.
+        """
+        out = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self._metrics_lock:
+            for (method, route), histogram in sorted(self.histograms.items()):
+                labels = 'method="%s",route="%s"' % (_label(method), _label(route))
+                total = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    total += count
+                    out.append(
+                        'http_request_duration_seconds_bucket{%s,le="%g"} %d'
+                        % (labels, bound, total)
+                    )
+                total += histogram.counts[-1]
+                out.append(
+                    'http_request_duration_seconds_bucket{%s,le="+Inf"} %d'
+                    % (labels, total)
+                )
+                out.append(
+                    "http_request_duration_seconds_sum{%s} %r" % (labels, histogram.sum)
+                )
+                out.append(
+                    "http_request_duration_seconds_count{%s} %d" % (labels, total)
+                )
+
+            out.append("# HELP http_requests_total Requests by route and status.")
+            out.append("# TYPE http_requests_total counter")
+            for (method, route, status), count in sorted(self.requests.items()):
+                out.append(
+                    'http_requests_total{method="%s",route="%s",status="%d"} %d'
+                    % (_label(method), _label(route), status, count)
+                )
+            written = self.written
+
+        buffer = self.buffer
+        gauges = [
+            (
+                "audit_buffer_events",
+                "gauge",
+                "Events waiting for the writer.",
+                len(buffer) if buffer else 0,
+            ),
+            (
+                "audit_buffer_capacity",
+                "gauge",
+                "Ring buffer size.",
+                buffer.capacity if buffer else 0,
+            ),
+            (
+                "audit_events_written_total",
+                "counter",
+                "Events written to the audit log.",
+                written,
+            ),
+            (
+                "audit_backpressure_waits_total",
+                "counter",
+                "Times a request waited for buffer space.",
+                buffer.waits if buffer else 0,
+            ),
+            (
+                "audit_write_errors_total",
+                "counter",
+                "Failed audit file writes.",
+                self.write_errors,
+            ),
+        ]
+        for name, kind, help_text, value in gauges:
+            out.append("# HELP %s %s" % (name, help_text))
+            out.append("# TYPE %s %s" % (name, kind))
+            out.append("%s %d" % (name, value))
+        return "\n".join(out) + "\n"
+
+
+class AuditMiddleware:
+    """Times every HTTP request and hands it to the audit log.
+
+    Installed outermost so cached responses are audited too. The request
+    path only pays for two clock reads and a buffer append.
+    """
+
+    def __init__(self, app, audit: AuditLog, exclude: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.audit = audit
+        self.exclude = frozenset(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        wall = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            await self.audit.record(
+                (
+                    wall,
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    time.perf_counter() - started,
+                    scope["headers"],
+                    scope.get("client"),
+                )
+            )
+
+
+audit_log = AuditLog()
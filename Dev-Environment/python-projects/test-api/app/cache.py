@@ -0,0 +1,308 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+
+# headers the server sets per response, never replayed from the cache
+_SKIPPED_HEADERS = (b"content-length", b"date", b"server", b"etag")
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+
+    def dumps(self) -> bytes:
+        meta = {
+            "etag": self.etag,
+            "headers": [
+                [k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers
+            ],
+        }
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedResponse":
+        meta, _, body = data.partition(b"\n")
+        meta = json.loads(meta)
+        headers = [
+            (k.encode("latin-1"), v.encode("latin-1")) for k, v in meta["headers"]
+        ]
+        return cls(body=body, etag=meta["etag"], headers=headers)
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class LRUCache:
+    """In-process LRU where every entry also expires after its TTL."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        # sync endpoints run in the threadpool, so guard the dict
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+
+class MemorySharedBackend:
+    """Local stand-in for a shared cache such as Redis.
+
+    Any object with the same async get/set/delete_prefix methods can be
+    passed to ResponseCache to share entries between workers.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return item[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+
+class ResponseCache:
+    """Two-tier response cache: a local LRU in front of an optional shared backend."""
+
+    def __init__(self, maxsize: int, shared=None):
+        self.local = LRUCache(maxsize)
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        # bumped on every invalidate(prefix), so a response rendered from
+        # data read before a write can tell it is stale
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str, ttl: float) -> Optional[CachedResponse]:
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            data = await self.shared.get(key)
+            if data is not None:
+                entry = CachedResponse.loads(data)
+                self.local.set(key, entry, ttl)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def generation(self, key: str) -> int:
+        return sum(
+            count
+            for prefix, count in self._generations.items()
+            if key.startswith(prefix)
+        )
+
+    async def set(
+        self,
+        key: str,
+        entry: CachedResponse,
+        ttl: float,
+        generation: Optional[int] = None,
+    ) -> None:
+        """Store entry, unless key was invalidated since ``generation`` was taken."""
+        if generation is not None and generation != self.generation(key):
+            return
+        self.local.set(key, entry, ttl)
+        if self.shared is not None:
+            await self.shared.set(key, entry.dumps(), ttl)
+
+    async def invalidate(self, prefix: str) -> None:
+        """Drop every cached response whose path starts with prefix."""
+        self._generations[prefix] = self._generations.get(prefix, 0) + 1
+        self.invalidations += self.local.delete_prefix(prefix)
+        if self.shared is not None:
+            await self.shared.delete_prefix(prefix)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "entries": len(self.local),
+            "evictions": self.local.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class CacheMiddleware:
+    """Serves cached GET responses with ETags for the paths in ``rules``.
+
+    ``rules`` maps a path to its TTL in seconds; a path ending in "/" also
+    covers everything below it. Only 200 responses are stored. Paths under
+    a ``revalidate`` prefix are sent with ``no-cache`` so clients always
+    come back with If-None-Match and see writes as soon as the server does.
+    """
+
+    def __init__(
+        self,
+        app,
+        cache: ResponseCache,
+        rules: Dict[str, float],
+        revalidate: Sequence[str] = (),
+    ):
+        self.app = app
+        self.cache = cache
+        self.revalidate = tuple(revalidate)
+        self.exact = {}
+        self.prefixes = []
+        for path, ttl in rules.items():
+            if path.endswith("/") and path != "/":
+                self.prefixes.append((path, ttl))
+            else:
+                self.exact[path] = ttl
+
+    def _ttl(self, path: str) -> Optional[float]:
+        if path in self.exact:
+            return self.exact[path]
+        for prefix, ttl in self.prefixes:
+            if path.startswith(prefix):
+                return ttl
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        ttl = self._ttl(scope["path"])
+        if ttl is None:
+            return await self.app(scope, receive, send)
+
+        key = scope["path"]
+        if scope.get("query_string"):
+            key += "?" + scope["query_string"].decode("latin-1")
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+
+        entry = await self.cache.get(key, ttl)
+        if entry is None:
+            # a write landing while this renders must not leave it cached
+            generation = self.cache.generation(key)
+            entry = await self._render(scope, receive, send)
+            if entry is None:
+                return
+            await self.cache.set(key, entry, ttl, generation)
+        if scope["path"].startswith(self.revalidate):
+            cache_control = b"no-cache"
+        else:
+            cache_control = b"private, max-age=%d" % int(ttl)
+        await self._send(send, entry, cache_control, if_none_match)
+
+    async def _render(self, scope, receive, send) -> Optional[CachedResponse]:
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                if message["status"] != 200:
+                    await send(message)
+            elif start.get("status") != 200:
+                await send(message)
+            else:
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        if start.get("status") != 200:
+            return None
+        body = b"".join(chunks)
+        headers = [
+            (k, v)
+            for k, v in start.get("headers", [])
+            if k.lower() not in _SKIPPED_HEADERS
+        ]
+        return CachedResponse(body=body, etag=make_etag(body), headers=headers)
+
+    async def _send(
+        self,
+        send,
+        entry: CachedResponse,
+        cache_control: bytes,
+        if_none_match: Optional[str],
+    ):
+        headers = entry.headers + [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", cache_control),
+        ]
+        if etag_matches(if_none_match, entry.etag):
+            self.cache.not_modified += 1
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers.append((b"content-length", str(len(entry.body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+# Each uvicorn worker has its own local tier and invalidate() only clears the
+# calling worker's. With WORKERS > 1, a write made through one worker can be
+# served stale by the others for up to CACHE_TTL seconds; lower CACHE_TTL
+# if that window matters. A shared backend spreads fills between workers
+# but does not shorten that window, since local tiers still expire on TTL.
+response_cache = ResponseCache(get_settings().cache_max_entries)
@@ -0,0 +1,98 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str
+    sqlite_db_path: str
+    max_connections: int
+    workers: int
+    db_pool_size: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    ingest_chunk_size: int
+    cache_max_entries: int
+    cache_ttl: float
+    health_cache_ttl: float
+    zoho_client_id: str
+    zoho_client_secret: str
+    zoho_refresh_token: str
+    zoho_accounts_server: str
+    zoho_api_domain: str
+    zoho_requests_per_minute: int
+    zoho_sync_enabled: bool
+    zoho_sync_interval: float
+    zoho_sync_concurrency: int
+    zoho_sync_modules: tuple
+    caregivers_file: str
+    log_file: str
+    log_max_bytes: int
+    audit_buffer_size: int
+    audit_batch_size: int
+    audit_flush_interval: float
+
+    @property
+    def connections_per_worker(self) -> int:
+        # MAX_CONNECTIONS is the budget for the whole deployment, each
+        # uvicorn worker owns its own pool
+        return max(1, self.max_connections // max(1, self.workers))
+
+    @property
+    def db_max_overflow(self) -> int:
+        return max(0, self.connections_per_worker - self.db_pool_size)
+
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    max_connections = int(os.getenv("MAX_CONNECTIONS", "100"))
+    workers = int(os.getenv("WORKERS", "1"))
+    per_worker = max(1, max_connections // max(1, workers))
+    return Settings(
+        database_url=os.getenv("DATABASE_URL", ""),
+        sqlite_db_path=os.getenv("SQLITE_DB_PATH", "./data/local.db"),
+        max_connections=max_connections,
+        workers=workers,
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", str(min(10, per_worker)))),
+        db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        ingest_chunk_size=int(os.getenv("INGEST_CHUNK_SIZE", "500")),
+        cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+        # also how long other workers may serve a record after a write,
+        # see app.cache.response_cache
+        cache_ttl=float(os.getenv("CACHE_TTL", "30")),
+        health_cache_ttl=float(os.getenv("HEALTH_CACHE_TTL", "2")),
+        zoho_client_id=os.getenv("ZOHO_CLIENT_ID", ""),
+        zoho_client_secret=os.getenv("ZOHO_CLIENT_SECRET", ""),
+        zoho_refresh_token=os.getenv("ZOHO_REFRESH_TOKEN", ""),
+        zoho_accounts_server=os.getenv(
+            "ZOHO_ACCOUNTS_SERVER", "https://accounts.zoho.com"
+        ),
+        zoho_api_domain=os.getenv("ZOHO_API_DOMAIN", "https://www.zohoapis.com"),
+        zoho_requests_per_minute=int(os.getenv("ZOHO_REQUESTS_PER_MINUTE", "100")),
+        zoho_sync_enabled=_flag(os.getenv("ZOHO_SYNC_ENABLED", "false")),
+        zoho_sync_interval=float(os.getenv("ZOHO_SYNC_INTERVAL", "300")),
+        zoho_sync_concurrency=int(os.getenv("ZOHO_SYNC_CONCURRENCY", "4")),
+        zoho_sync_modules=tuple(
+            module.strip()
+            for module in os.getenv("ZOHO_SYNC_MODULES", "Leads").split(",")
+            if module.strip()
+        ),
+        # the caregiver pool all workers match against, rewritten by
+        # PUT /api/matching/caregivers; required for that call if WORKERS > 1
+        caregivers_file=os.getenv("CAREGIVERS_FILE", ""),
+        log_file=os.getenv("LOG_FILE", "./logs/app.log"),
+        log_max_bytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        audit_buffer_size=int(os.getenv("AUDIT_BUFFER_SIZE", "10000")),
+        audit_batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+        audit_flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL", "1")),
+    )
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# every uvicorn worker creates the schema at startup; this key serialises
+# them on Postgres, and losers of a SQLite race simply retry
+SCHEMA_LOCK_KEY = 472800
+SCHEMA_ATTEMPTS = 5
+
+engine: Optional[AsyncEngine] = None
+SessionLocal: Optional[async_sessionmaker] = None
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+def postgres_url(url: str) -> str:
+    """Point a plain postgres URL at the asyncpg driver."""
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix) :]
+    return url
+
+
+def sqlite_url(path: str) -> str:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    return "sqlite+aiosqlite:///" + path
+
+
+def _create_engine(url: str, settings: Settings) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+    )
+
+
+async def _connect_postgres(settings: Settings) -> Optional[AsyncEngine]:
+    url = postgres_url(settings.database_url)
+    if not url.startswith("postgresql+asyncpg://"):
+        return None
+    try:
+        candidate = _create_engine(url, settings)
+    except ImportError:
+        logger.warning("asyncpg is not installed, using SQLite")
+        return None
+    try:
+        async with candidate.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except (OSError, SQLAlchemyError) as exc:
+        logger.warning("Postgres unavailable (%s), using SQLite", exc)
+        await candidate.dispose()
+        return None
+    return candidate
+
+
+async def init_engine(settings: Settings) -> AsyncEngine:
+    """Open the shared pool, preferring Postgres and falling back to SQLite."""
+    global engine, SessionLocal
+    engine = await _connect_postgres(settings)
+    if engine is None:
+        engine = _create_engine(sqlite_url(settings.sqlite_db_path), settings)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    await create_schema(engine)
+    return engine
+
+
+async def create_schema(engine: AsyncEngine) -> None:
+    """Create missing tables, tolerating other workers doing the same."""
+    for attempt in range(1, SCHEMA_ATTEMPTS + 1):
+        try:
+            async with engine.begin() as conn:
+                if conn.dialect.name == "postgresql":
+                    await conn.execute(
+                        text("SELECT pg_advisory_xact_lock(:key)"),
+                        {"key": SCHEMA_LOCK_KEY},
+                    )
+                await conn.run_sync(Base.metadata.create_all)
+            return
+        except SQLAlchemyError as exc:
+            # e.g. "table leads already exists": another worker won the
+            # check-then-create race, the next checkfirst pass sees it
+            if attempt == SCHEMA_ATTEMPTS:
+                raise
+            logger.info("schema creation raced another worker, retrying: %s", exc)
+            await asyncio.sleep(0.1 * attempt)
+
+
+async def dispose_engine() -> None:
+    global engine, SessionLocal
+    if engine is not None:
+        await engine.dispose()
+    engine = None
+    SessionLocal = None
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding one pooled session per request."""
+    if SessionLocal is None:
+        raise RuntimeError("database engine is not initialised")
+    async with SessionLocal() as session:
+        yield session
+
+
+def pool_status() -> dict:
+    if engine is None:
+        return {"backend": None}
+    pool = engine.pool
+    status = {"backend": engine.dialect.name, "pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if counter is not None:
+            status[name] = counter()
+    return status
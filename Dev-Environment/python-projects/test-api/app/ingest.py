@@ -0,0 +1,274 @@
+import csv
+import json
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Lead
+from app.schemas import IngestResult, LeadIn, RowError
+
+# keep the response bounded however many rows fail
+MAX_REPORTED_ERRORS = 1000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_TYPES = ("text/csv", "application/csv")
+
+# longest line held in memory; past it the rest of the line is skipped
+MAX_LINE_BYTES = 64 * 1024
+
+INVALID_UTF8 = "line is not valid UTF-8"
+LINE_TOO_LONG = "line is longer than %d bytes" % MAX_LINE_BYTES
+
+# a parsed row, or the message explaining why it could not be parsed
+Row = Tuple[int, object]
+
+_leads_adapter = TypeAdapter(List[LeadIn])
+# status belongs to the CRM pipeline once a lead exists, imports only set it
+# on insert
+_UPDATABLE = ("first_name", "last_name", "phone", "source")
+# the CRM sync mirrors Zoho, status and cleared fields included
+_MIRRORED = _UPDATABLE + ("status",)
+
+
+def _normalise_key(key: str) -> str:
+    return key.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+# a decoded line, or None and the message explaining why it was dropped
+Line = Tuple[Optional[str], Optional[str]]
+
+
+def _decode(line: bytes, first: bool) -> Line:
+    if len(line) > MAX_LINE_BYTES:
+        return None, LINE_TOO_LONG
+    try:
+        return line.decode("utf-8-sig" if first else "utf-8"), None
+    except UnicodeDecodeError:
+        return None, INVALID_UTF8
+
+
+def _split_lf(data: bytes) -> List[bytes]:
+    """Complete lines with their breaks, then the unfinished rest."""
+    lines = [line + b"\n" for line in data.split(b"\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines
+
+
+def _split_csv(data: bytes) -> List[bytes]:
+    # CSV also ends lines on a lone \r, as classic Mac exports do. A \r\n cut
+    # between chunks reads as \r and a blank line, which the CSV reader skips
+    # or, inside a quoted cell, joins back up
+    lines = data.splitlines(keepends=True)
+    if not lines or lines[-1].endswith((b"\n", b"\r")):
+        lines.append(b"")
+    return lines
+
+
+async def _lines(
+    chunks: AsyncIterator[bytes],
+    split: Callable[[bytes], List[bytes]] = _split_lf,
+) -> AsyncIterator[Line]:
+    """Body lines, decoded one by one, each holding at most MAX_LINE_BYTES."""
+    pending = b""
+    first = True
+    skipping = False
+    async for chunk in chunks:
+        # line breaks never occur inside a multi-byte UTF-8 sequence
+        lines = split(pending + chunk)
+        # the last piece may be cut mid-line, carry it into the next chunk
+        pending = lines.pop()
+        for line in lines:
+            if skipping:
+                # the end of an over-long line, already reported
+                skipping = False
+                continue
+            yield _decode(line, first)
+            first = False
+        if skipping:
+            pending = b""
+        elif len(pending) > MAX_LINE_BYTES:
+            # report it now and drop the rest as it arrives
+            yield None, LINE_TOO_LONG
+            first = False
+            pending = b""
+            skipping = True
+    if pending:
+        yield _decode(pending, first)
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    number = 0
+    async for line, error in _lines(chunks):
+        if line is None:
+            number += 1
+            yield number, error
+            continue
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            value = json.loads(line)
+        except ValueError as exc:
+            yield number, "invalid JSON: %s" % exc
+            continue
+        if not isinstance(value, dict):
+            yield number, "expected a JSON object"
+            continue
+        yield number, {_normalise_key(key): item for key, item in value.items()}
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    header = None
+    number = 0
+    record = ""
+    async for line, error in _lines(chunks, _split_csv):
+        if line is None:
+            # drops any quoted cell the bad line was part of as well
+            number += 1
+            record = ""
+            yield number, error
+            continue
+        record += line
+        # an odd number of quotes means a quoted cell continues on the next line
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_BYTES:
+                number += 1
+                record = ""
+                yield number, LINE_TOO_LONG
+            continue
+        text, record = record, ""
+        try:
+            cells = next(csv.reader([text]), [])
+        except csv.Error as exc:
+            number += 1
+            yield number, "malformed CSV row: %s" % exc
+            continue
+        if not any(cell.strip() for cell in cells):
+            continue
+        if header is None:
+            header = [_normalise_key(cell) for cell in cells]
+            continue
+        number += 1
+        if len(cells) > len(header):
+            yield number, "row has %d cells, header has %d" % (len(cells), len(header))
+            continue
+        yield number, dict(zip(header, cells))
+    if record:
+        number += 1
+        yield number, "unterminated quoted cell"
+
+
+def _validate(batch: List[Row]) -> Tuple[List[Tuple[int, LeadIn]], List[RowError]]:
+    numbers = [number for number, row in batch if isinstance(row, dict)]
+    rows = [row for _, row in batch if isinstance(row, dict)]
+    errors = [
+        RowError(row=number, errors=[row])
+        for number, row in batch
+        if not isinstance(row, dict)
+    ]
+    try:
+        # one call for the common all-valid batch
+        return list(zip(numbers, _leads_adapter.validate_python(rows))), errors
+    except ValidationError:
+        pass
+
+    valid = []
+    for number, row in zip(numbers, rows):
+        try:
+            valid.append((number, LeadIn.model_validate(row)))
+        except ValidationError as exc:
+            errors.append(
+                RowError(
+                    row=number,
+                    errors=exc.errors(
+                        include_url=False, include_context=False, include_input=False
+                    ),
+                )
+            )
+    errors.sort(key=lambda error: error.row)
+    return valid, errors
+
+
+def _upsert_statement(dialect: str, mirror: bool):
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = insert(Lead)
+    if mirror:
+        update = {name: stmt.excluded[name] for name in _MIRRORED}
+    else:
+        # a blank cell in an import keeps what is already stored
+        update = {
+            name: func.coalesce(stmt.excluded[name], Lead.__table__.c[name])
+            for name in _UPDATABLE
+        }
+    update["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(index_elements=[Lead.email], set_=update)
+
+
+# one compiled statement per dialect and mode, each chunk only sends parameters
+_statements = {}
+
+
+def _upsert(dialect: str, leads: Iterable[LeadIn], mirror: bool = False):
+    key = (dialect, mirror)
+    if key not in _statements:
+        _statements[key] = _upsert_statement(dialect, mirror)
+    # later rows win when an email repeats within a chunk
+    values = list({lead.email: lead.model_dump() for lead in leads}.values())
+    return _statements[key], values
+
+
+async def upsert_leads(
+    session: AsyncSession, leads: Iterable[LeadIn], mirror: bool = False
+) -> int:
+    """Upsert validated leads on email and commit; returns the rows written.
+
+    Imports only fill in contact fields. With mirror, every field including
+    status is overwritten, so the row matches the source record.
+    """
+    stmt, values = _upsert(session.bind.dialect.name, leads, mirror)
+    if values:
+        await session.execute(stmt, values)
+        await session.commit()
+    return len(values)
+
+
+async def _write(session: AsyncSession, batch: List[Row], result: IngestResult) -> None:
+    valid, errors = _validate(batch)
+    if valid:
+        try:
+            result.upserted += await upsert_leads(session, [lead for _, lead in valid])
+        except SQLAlchemyError as exc:
+            await session.rollback()
+            message = str(getattr(exc, "orig", exc))
+            errors.extend(RowError(row=number, errors=[message]) for number, _ in valid)
+    _record(result, errors)
+
+
+def _record(result: IngestResult, errors: List[RowError]) -> None:
+    result.failed += len(errors)
+    room = MAX_REPORTED_ERRORS - len(result.errors)
+    if len(errors) > room:
+        result.errors_truncated = True
+    result.errors.extend(errors[: max(0, room)])
+
+
+async def ingest_leads(
+    session: AsyncSession, rows: AsyncIterator[Row], chunk_size: int
+) -> IngestResult:
+    """Validate and upsert streamed rows, chunk_size rows per statement."""
+    result = IngestResult(received=0, upserted=0, failed=0, errors=[])
+    batch: List[Row] = []
+    async for row in rows:
+        result.received += 1
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            await _write(session, batch, result)
+            batch = []
+    if batch:
+        await _write(session, batch, result)
+    return result
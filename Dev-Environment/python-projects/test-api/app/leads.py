@@ -0,0 +1,52 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import response_cache
+from app.config import get_settings
+from app.database import get_session
+from app.ingest import CSV_TYPES, NDJSON_TYPES, ingest_leads, iter_csv, iter_ndjson
+from app.models import Lead
+from app.schemas import IngestResult, LeadOut
+
+router = APIRouter(prefix="/api/crm", tags=["crm"])
+
+# cached by CacheMiddleware, dropped whenever leads are written
+RECORDS_PREFIX = "/api/crm/records/"
+
+# bounds how many validated rows are held in memory at once
+MAX_CHUNK_SIZE = 5000
+
+
+@router.post("/leads", response_model=IngestResult)
+async def create_leads(
+    request: Request,
+    chunk_size: Optional[int] = Query(default=None, ge=1, le=MAX_CHUNK_SIZE),
+    session: AsyncSession = Depends(get_session),
+):
+    """Bulk upsert leads from an NDJSON or CSV body, streamed row by row."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        rows = iter_ndjson(request.stream())
+    elif content_type in CSV_TYPES:
+        rows = iter_csv(request.stream())
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="send leads as application/x-ndjson or text/csv",
+        )
+    result = await ingest_leads(
+        session, rows, chunk_size or get_settings().ingest_chunk_size
+    )
+    if result.upserted:
+        await response_cache.invalidate(RECORDS_PREFIX)
+    return result
+
+
+@router.get("/records/{lead_id}", response_model=LeadOut)
+async def read_record(lead_id: int, session: AsyncSession = Depends(get_session)):
+    lead = await session.get(Lead, lead_id)
+    if lead is None:
+        raise HTTPException(status_code=404, detail="record not found")
+    return lead
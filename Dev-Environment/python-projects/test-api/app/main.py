@@ -1,10 +1,61 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.audit import AuditMiddleware, audit_log
+from app.cache import CacheMiddleware, response_cache
+from app.config import get_settings
+from app.leads import RECORDS_PREFIX, router as leads_router
+from app.matches import refresh_index, router as matches_router
+from app.sync import SyncWorker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    await audit_log.start(settings, app.routes)
+    await database.init_engine(settings)
+    refresh_index(app.state, settings.caregivers_file)
+    worker = task = None
+    if settings.zoho_sync_enabled:
+        worker = SyncWorker(settings, database.SessionLocal)
+        task = asyncio.create_task(worker.run_forever())
+    app.state.zoho_sync = worker
+    yield
+    if task is not None:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        await worker.aclose()
+    await database.dispose_engine()
+    await audit_log.stop()
+
 
 app = FastAPI(
     title="test-api",
     description="Sabir's test-api API",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+# Response caching sits inside CORS so cached replies still get CORS headers
+app.add_middleware(
+    CacheMiddleware,
+    cache=response_cache,
+    rules={
+        "/": get_settings().cache_ttl,
+        "/health": get_settings().health_cache_ttl,
+        RECORDS_PREFIX: get_settings().cache_ttl,
+    },
+    # records change under writes, clients must revalidate every time
+    revalidate=(RECORDS_PREFIX,),
 )
 
 # CORS Configuration
@@ -16,6 +67,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so every request is timed and audited, cache hits included
+app.add_middleware(AuditMiddleware, audit=audit_log)
+
+app.include_router(leads_router)
+app.include_router(matches_router)
+
+
 @app.get("/")
 def read_root():
     return {
@@ -25,6 +83,23 @@ def read_root():
         "developer": "Sabir Asheed",
     }
 
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(
+        audit_log.metrics(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+async def health_check(session: AsyncSession = Depends(database.get_session)):
+    try:
+        await session.execute(text("SELECT 1"))
+        status = "healthy"
+    except SQLAlchemyError:
+        status = "degraded"
+    return {
+        "status": status,
+        "database": database.pool_status(),
+        "cache": response_cache.stats(),
+    }
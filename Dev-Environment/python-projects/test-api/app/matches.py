@@ -0,0 +1,104 @@
+import os
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import TypeAdapter
+
+from app.config import get_settings
+from app.matching import CaregiverIndex
+from app.schemas import (
+    CaregiverIn,
+    CaregiverIndexOut,
+    MatchBatchIn,
+    MatchBatchOut,
+    MatchOut,
+    RequestMatches,
+)
+
+router = APIRouter(prefix="/api/matching", tags=["matching"])
+
+_caregivers = TypeAdapter(List[CaregiverIn])
+
+
+def load_index(path: str) -> CaregiverIndex:
+    """Build the index from a JSON file shaped like the PUT /caregivers body."""
+    with open(path, "rb") as f:
+        return CaregiverIndex(_caregivers.validate_json(f.read()))
+
+
+def _version(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def refresh_index(state, path: str) -> Optional[CaregiverIndex]:
+    """The worker's index, rebuilt first if the pool file has changed.
+
+    Each uvicorn worker keeps its own index. CAREGIVERS_FILE is the shared
+    copy: PUT /caregivers replaces it, and every worker notices the new
+    file on its next match and reloads.
+    """
+    if path:
+        version = _version(path)
+        if version is not None and version != getattr(state, "caregiver_version", None):
+            state.caregiver_index = load_index(path)
+            state.caregiver_version = version
+    return getattr(state, "caregiver_index", None)
+
+
+def _save_pool(path: str, caregivers: List[CaregiverIn]) -> None:
+    # written aside and renamed, so other workers never read half a file
+    partial = "%s.%d.tmp" % (path, os.getpid())
+    with open(partial, "wb") as f:
+        f.write(_caregivers.dump_json(caregivers))
+    os.replace(partial, path)
+
+
+# scoring is CPU bound, plain def endpoints run it in the threadpool
+@router.put("/caregivers", response_model=CaregiverIndexOut)
+def load_caregivers(caregivers: List[CaregiverIn], request: Request):
+    """Replace the caregiver pool and rebuild its matching index."""
+    settings = get_settings()
+    path = settings.caregivers_file
+    if path:
+        _save_pool(path, caregivers)
+    elif settings.workers > 1:
+        # the other workers would keep matching against their old pool
+        raise HTTPException(
+            status_code=409,
+            detail="set CAREGIVERS_FILE to share the caregiver pool between workers",
+        )
+    index = CaregiverIndex(caregivers)
+    state = request.app.state
+    state.caregiver_index = index
+    state.caregiver_version = _version(path) if path else None
+    return CaregiverIndexOut(caregivers=len(index), cells=len(index.cells))
+
+
+@router.post("/requests", response_model=MatchBatchOut)
+def match_requests(batch: MatchBatchIn, request: Request):
+    """Top-k caregivers for each open family request."""
+    index = refresh_index(request.app.state, get_settings().caregivers_file)
+    if index is None:
+        raise HTTPException(status_code=409, detail="load caregivers first")
+    matches = index.match(batch.requests, batch.top_k)
+    return MatchBatchOut(
+        results=[
+            RequestMatches(
+                request_id=care_request.id,
+                matches=[
+                    MatchOut(
+                        caregiver_id=caregiver_id,
+                        score=score,
+                        distance_km=distance,
+                        availability_coverage=coverage,
+                    )
+                    for caregiver_id, score, distance, coverage in found
+                ],
+            )
+            for care_request, found in zip(batch.requests, matches)
+        ]
+    )
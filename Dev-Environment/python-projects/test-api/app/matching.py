@@ -0,0 +1,323 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.schemas import AvailabilityWindow, CaregiverIn, CareRequestIn
+
+EARTH_RADIUS_KM = 6371.0
+# on the same sphere haversine_km uses, so grid reach never falls short
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+DEFAULT_CELL_KM = 25.0
+# requests scored together; bounds memory when one cell holds a whole metro
+BLOCK_SIZE = 64
+
+# one bit per hour of the week, Monday 00:00 first
+HOURS_PER_WEEK = 7 * 24
+AVAILABILITY_WORDS = (HOURS_PER_WEEK + 63) // 64
+
+WEIGHTS = {
+    "availability": 0.4,
+    "distance": 0.3,
+    "language": 0.2,
+    "certifications": 0.1,
+}
+
+_WORD_MASK = (1 << 64) - 1
+
+# (caregiver id, score, distance km, share of requested hours covered)
+Match = Tuple[str, float, float, float]
+
+
+def _words(bits: int, count: int) -> List[int]:
+    return [(bits >> (64 * i)) & _WORD_MASK for i in range(count)]
+
+
+def availability_bits(windows: Iterable[AvailabilityWindow]) -> List[int]:
+    bits = 0
+    for window in windows:
+        width = window.end_hour - window.start_hour
+        bits |= ((1 << width) - 1) << (window.day * 24 + window.start_hour)
+    return _words(bits, AVAILABILITY_WORDS)
+
+
+def _terms(terms: Iterable[str]) -> set:
+    return {term.strip().lower() for term in terms}
+
+
+class Vocabulary:
+    """Assigns each certification or language a bit position."""
+
+    def __init__(self, terms: Iterable[str]):
+        self.positions: Dict[str, int] = {}
+        for term in _terms(terms):
+            self.positions[term] = len(self.positions)
+        self.words = max(1, (len(self.positions) + 63) // 64)
+
+    def bits(self, terms: Iterable[str]) -> Tuple[List[int], bool]:
+        """Bitset words for terms, and whether every term was known."""
+        bits = 0
+        known = True
+        for term in terms:
+            position = self.positions.get(term.strip().lower())
+            if position is None:
+                known = False
+            else:
+                bits |= 1 << position
+        return _words(bits, self.words), known
+
+
+def _bitset_matrix(rows: Sequence[List[int]], words: int) -> np.ndarray:
+    return np.array(rows, dtype=np.uint64).reshape(len(rows), words)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    return np.bitwise_count(values).sum(axis=-1, dtype=np.int32)
+
+
+def _shares_bit(rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """rows x columns mask of pairs with a set bit in common.
+
+    ``columns`` is word-major (words x n) so each word is one contiguous
+    broadcast; looping over the few words beats reducing a tiny last axis.
+    """
+    shared = rows[:, 0, None] & columns[0]
+    for word in range(1, len(columns)):
+        shared |= rows[:, word, None] & columns[word]
+    return shared != 0
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance between radian coordinate arrays."""
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CaregiverIndex:
+    """Precomputed arrays and a lat/lon grid for scoring caregivers in bulk."""
+
+    def __init__(
+        self, caregivers: Sequence[CaregiverIn], cell_km: float = DEFAULT_CELL_KM
+    ):
+        self.ids = [caregiver.id for caregiver in caregivers]
+        lat = np.array(
+            [caregiver.latitude for caregiver in caregivers], dtype=np.float64
+        )
+        lon = np.array(
+            [caregiver.longitude for caregiver in caregivers], dtype=np.float64
+        )
+        self.lat = np.radians(lat)
+        self.lon = np.radians(lon)
+
+        self.availability = _bitset_matrix(
+            [availability_bits(caregiver.availability) for caregiver in caregivers],
+            AVAILABILITY_WORDS,
+        )
+        self.cert_vocab = Vocabulary(
+            term for caregiver in caregivers for term in caregiver.certifications
+        )
+        self.certifications = _bitset_matrix(
+            [
+                self.cert_vocab.bits(caregiver.certifications)[0]
+                for caregiver in caregivers
+            ],
+            self.cert_vocab.words,
+        )
+        self.lang_vocab = Vocabulary(
+            term for caregiver in caregivers for term in caregiver.languages
+        )
+        self.languages = _bitset_matrix(
+            [self.lang_vocab.bits(caregiver.languages)[0] for caregiver in caregivers],
+            self.lang_vocab.words,
+        )
+
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self.cells = self._grid(lat, lon)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cell(self, lat, lon):
+        rows = np.floor(lat / self.cell_deg).astype(np.int64)
+        cols = np.floor(lon / self.cell_deg).astype(np.int64)
+        return rows, cols
+
+    def _grid(
+        self, lat: np.ndarray, lon: np.ndarray
+    ) -> Dict[Tuple[int, int], np.ndarray]:
+        rows, cols = self._cell(lat, lon)
+        order = np.lexsort((cols, rows))
+        keys = np.stack((rows[order], cols[order]), axis=1)
+        starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        cells = {}
+        for members in np.split(order, starts):
+            if len(members):
+                cells[(int(rows[members[0]]), int(cols[members[0]]))] = members
+        return cells
+
+    def candidates(self, row: int, col: int, radius_km: float) -> np.ndarray:
+        """Caregivers in every grid cell within radius_km of cell (row, col)."""
+        reach_rows = math.ceil(radius_km / KM_PER_DEGREE / self.cell_deg)
+        # longitude degrees shrink towards the poles, widen the search there
+        edge = (max(abs(row), abs(row + 1)) + reach_rows) * self.cell_deg
+        shrink = max(math.cos(math.radians(min(edge, 89.0))), 0.01)
+        reach_cols = math.ceil(radius_km / (KM_PER_DEGREE * shrink) / self.cell_deg)
+        found = [
+            self.cells[key]
+            for key in (
+                (r, c)
+                for r in range(row - reach_rows, row + reach_rows + 1)
+                for c in range(col - reach_cols, col + reach_cols + 1)
+            )
+            if key in self.cells
+        ]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    def match(
+        self, requests: Sequence[CareRequestIn], top_k: int = 5
+    ) -> List[List[Match]]:
+        """Top ``top_k`` caregivers for each request, best first.
+
+        Requests that share a grid cell are scored together as one
+        request x candidate matrix.
+        """
+        results: List[List[Match]] = [[] for _ in requests]
+        if not requests or not len(self):
+            return results
+
+        lat = np.radians([request.latitude for request in requests])
+        lon = np.radians([request.longitude for request in requests])
+        rows, cols = self._cell(np.degrees(lat), np.degrees(lon))
+        max_km = np.array([request.max_distance_km for request in requests])
+        availability = _bitset_matrix(
+            [availability_bits(request.availability) for request in requests],
+            AVAILABILITY_WORDS,
+        )
+        required, possible = [], []
+        for request in requests:
+            bits, known = self.cert_vocab.bits(request.required_certifications)
+            required.append(bits)
+            # nobody holds a certification the index has never seen
+            possible.append(known)
+        required = _bitset_matrix(required, self.cert_vocab.words)
+        possible = np.array(possible)
+        preferred = _bitset_matrix(
+            [
+                self.cert_vocab.bits(request.preferred_certifications)[0]
+                for request in requests
+            ],
+            self.cert_vocab.words,
+        )
+        # counted from the request itself so unknown terms still count as wanted
+        preferred_count = np.array(
+            [len(_terms(request.preferred_certifications)) for request in requests]
+        )
+        languages = _bitset_matrix(
+            [self.lang_vocab.bits(request.languages)[0] for request in requests],
+            self.lang_vocab.words,
+        )
+        wants_language = np.array(
+            [bool(_terms(request.languages)) for request in requests]
+        )
+
+        groups = defaultdict(list)
+        for i, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            groups[key].append(i)
+
+        for (row, col), members in groups.items():
+            members = np.array(members)
+            cand = self.candidates(row, col, float(max_km[members].max()))
+            if not len(cand):
+                continue
+            # word-major copies, gathered once for every block of the group
+            cand_availability = np.ascontiguousarray(self.availability[cand].T)
+            cand_missing = np.ascontiguousarray(~self.certifications[cand].T)
+            for offset in range(0, len(members), BLOCK_SIZE):
+                block = members[offset : offset + BLOCK_SIZE]
+                self._score_block(
+                    block,
+                    cand,
+                    cand_availability,
+                    cand_missing,
+                    results,
+                    top_k,
+                    lat=lat[block],
+                    lon=lon[block],
+                    max_km=max_km[block],
+                    availability=availability[block],
+                    required=required[block],
+                    possible=possible[block],
+                    preferred=preferred[block],
+                    preferred_count=preferred_count[block],
+                    languages=languages[block],
+                    wants_language=wants_language[block],
+                )
+        return results
+
+    def _score_block(
+        self, members, cand, cand_availability, cand_missing, results, top_k, **req
+    ) -> None:
+        # prefilter on the bitsets: only pairs that share an hour and hold
+        # every required certification get distances and scores
+        wanted = _popcount(req["availability"])
+        lacking = _shares_bit(req["required"], cand_missing)
+        overlaps = _shares_bit(req["availability"], cand_availability)
+        # a request without windows takes any schedule
+        overlaps |= (wanted == 0)[:, None]
+        mask = overlaps & ~lacking & req["possible"][:, None]
+        rows, cols = np.nonzero(mask)
+        if not len(rows):
+            return
+
+        people = cand[cols]
+        distance = haversine_km(
+            req["lat"][rows], req["lon"][rows], self.lat[people], self.lon[people]
+        )
+        near = distance <= req["max_km"][rows]
+        rows, people, distance = rows[near], people[near], distance[near]
+        if not len(rows):
+            return
+
+        overlap = _popcount(req["availability"][rows] & self.availability[people])
+        coverage = np.where(
+            wanted[rows] > 0, overlap / np.maximum(wanted[rows], 1), 1.0
+        )
+        wanted_pref = req["preferred_count"][rows]
+        preferred = np.where(
+            wanted_pref > 0,
+            _popcount(self.certifications[people] & req["preferred"][rows])
+            / np.maximum(wanted_pref, 1),
+            1.0,
+        )
+        spoken = _popcount(self.languages[people] & req["languages"][rows])
+        language = np.where(req["wants_language"][rows], spoken > 0, 1.0)
+        score = (
+            WEIGHTS["availability"] * coverage
+            + WEIGHTS["distance"] * (1 - distance / req["max_km"][rows])
+            + WEIGHTS["language"] * language
+            + WEIGHTS["certifications"] * preferred
+        )
+
+        # best first within each request, then the first top_k of each run
+        order = np.lexsort((-score, rows))
+        ranked_rows = rows[order]
+        starts = np.searchsorted(ranked_rows, np.arange(len(members)))
+        ends = np.searchsorted(ranked_rows, np.arange(len(members)), side="right")
+        for row, request in enumerate(members.tolist()):
+            results[request] = [
+                (
+                    self.ids[people[i]],
+                    round(float(score[i]), 4),
+                    round(float(distance[i]), 2),
+                    round(float(coverage[i]), 4),
+                )
+                for i in order[
+                    starts[row] : min(ends[row], starts[row] + top_k)
+                ].tolist()
+            ]
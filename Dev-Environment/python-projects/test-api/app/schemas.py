@@ -0,0 +1,138 @@
+from typing import Optional
+
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+
+class LeadIn(BaseModel):
+    """One imported lead row. Header aliases cover Mailchimp exports."""
+
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+    email: str = Field(
+        max_length=254,
+        pattern=EMAIL_PATTERN,
+        validation_alias=AliasChoices("email", "email_address"),
+    )
+    first_name: Optional[str] = Field(default=None, max_length=100)
+    last_name: Optional[str] = Field(default=None, max_length=100)
+    phone: Optional[str] = Field(
+        default=None,
+        max_length=32,
+        validation_alias=AliasChoices("phone", "phone_number"),
+    )
+    source: Optional[str] = Field(default=None, max_length=50)
+    status: str = Field(default="new", max_length=30)
+
+    @field_validator("first_name", "last_name", "phone", "source", mode="before")
+    @classmethod
+    def blank_to_none(cls, value):
+        # spreadsheet exports leave unset cells as empty strings
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def blank_status(cls, value):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return "new"
+        return value
+
+    @field_validator("email")
+    @classmethod
+    def normalise_email(cls, value: str) -> str:
+        return value.lower()
+
+
+class LeadOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone: Optional[str] = None
+    source: Optional[str] = None
+    status: str
+
+
+class RowError(BaseModel):
+    row: int
+    errors: list
+
+
+class IngestResult(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    errors: list[RowError]
+    errors_truncated: bool = False
+
+
+class AvailabilityWindow(BaseModel):
+    """Hours [start_hour, end_hour) on a weekday, 0 is Monday."""
+
+    day: int = Field(ge=0, le=6)
+    start_hour: int = Field(ge=0, le=23)
+    end_hour: int = Field(ge=1, le=24)
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.end_hour <= self.start_hour:
+            raise ValueError("end_hour must be after start_hour")
+        return self
+
+
+class CaregiverIn(BaseModel):
+    id: str
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    certifications: list[str] = []
+    languages: list[str] = []
+    availability: list[AvailabilityWindow] = []
+
+
+class CareRequestIn(BaseModel):
+    id: str
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    max_distance_km: float = Field(default=25.0, gt=0, le=500)
+    required_certifications: list[str] = []
+    preferred_certifications: list[str] = []
+    languages: list[str] = []
+    availability: list[AvailabilityWindow] = []
+
+
+class MatchBatchIn(BaseModel):
+    requests: list[CareRequestIn]
+    top_k: int = Field(default=5, ge=1, le=50)
+
+
+class MatchOut(BaseModel):
+    caregiver_id: str
+    score: float
+    distance_km: float
+    availability_coverage: float
+
+
+class RequestMatches(BaseModel):
+    request_id: str
+    matches: list[MatchOut]
+
+
+class MatchBatchOut(BaseModel):
+    results: list[RequestMatches]
+
+
+class CaregiverIndexOut(BaseModel):
+    caregivers: int
+    cells: int
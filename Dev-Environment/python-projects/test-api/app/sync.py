@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import response_cache
+from app.config import Settings
+from app.ingest import upsert_leads
+from app.models import SyncCheckpoint
+from app.schemas import LeadIn
+from app.zoho import ZohoClient, ZohoError
+
+logger = logging.getLogger(__name__)
+
+# Zoho field -> LeadIn field
+LEAD_FIELDS = {
+    "Email": "email",
+    "First_Name": "first_name",
+    "Last_Name": "last_name",
+    "Phone": "phone",
+    "Lead_Source": "source",
+    "Lead_Status": "status",
+}
+
+
+@dataclass
+class SyncStats:
+    module: str
+    fetched: int = 0
+    upserted: int = 0
+    skipped: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+    checkpoint: Optional[str] = None
+
+    @property
+    def records_per_second(self) -> float:
+        return self.fetched / self.seconds if self.seconds else 0.0
+
+
+def to_lead(record: dict) -> Optional[LeadIn]:
+    try:
+        return LeadIn.model_validate(
+            {field: record.get(name) for name, field in LEAD_FIELDS.items()}
+        )
+    except ValidationError:
+        return None
+
+
+def _modified(record: dict) -> Optional[datetime]:
+    value = record.get("Modified_Time")
+    # offsets differ between records, so compare as datetimes
+    return datetime.fromisoformat(value) if value else None
+
+
+def _later(current: Optional[str], candidate: Optional[str]) -> Optional[str]:
+    if not candidate:
+        return current
+    if current is None:
+        return candidate
+    if datetime.fromisoformat(candidate) > datetime.fromisoformat(current):
+        return candidate
+    return current
+
+
+async def load_checkpoint(session: AsyncSession, module: str) -> Optional[str]:
+    row = await session.get(SyncCheckpoint, module)
+    return row.modified_time if row else None
+
+
+async def save_checkpoint(
+    session: AsyncSession, module: str, modified_time: str
+) -> None:
+    row = await session.get(SyncCheckpoint, module)
+    if row is None:
+        session.add(SyncCheckpoint(module=module, modified_time=modified_time))
+    else:
+        row.modified_time = modified_time
+    await session.commit()
+
+
+# (id, Modified_Time) of records a later query may return again
+Overlap = Dict[Tuple[object, str], datetime]
+
+
+def _rewind(modified_time: str) -> datetime:
+    # Zoho filters on whole seconds, step back one to re-read the boundary
+    return datetime.fromisoformat(modified_time) - timedelta(seconds=1)
+
+
+def _prune(overlap: Overlap, since: datetime) -> None:
+    for key in [key for key, modified in overlap.items() if modified < since]:
+        del overlap[key]
+
+
+async def sync_module(
+    client: ZohoClient,
+    session: AsyncSession,
+    module: str,
+    overlap: Optional[Overlap] = None,
+) -> SyncStats:
+    """Pull records changed since the module's checkpoint and upsert them.
+
+    Each page re-queries from the newest Modified_Time seen so far rather
+    than asking for a deeper page offset: a record edited mid-run moves to
+    the end of the ordering, which would shift later offsets and skip a
+    record. Every query, the first of a run included, steps back a second
+    so records modified in the same second as the boundary are not missed;
+    repeats already read are recognised through overlap and skipped. Pass
+    the same overlap to the next run to carry that across runs.
+    The checkpoint only moves once the whole run has been written, so a
+    failed run is retried from the same point on the next pass.
+    """
+    stats = SyncStats(module=module)
+    started = time.perf_counter()
+    since = await load_checkpoint(session, module)
+    latest = since
+    cursor = None
+    if overlap is None:
+        overlap = {}
+    if since is not None:
+        rewound = _rewind(since)
+        cursor = rewound.isoformat()
+        _prune(overlap, rewound)
+    page = 1
+    while True:
+        records, more = await client.records(module, page, cursor)
+        stats.pages += 1
+        leads: List[LeadIn] = []
+        read: Overlap = {}
+        for record in records:
+            modified = _modified(record)
+            key = (record.get("id"), record.get("Modified_Time"))
+            if key in overlap or key in read:
+                continue
+            if modified is not None:
+                read[key] = modified
+            stats.fetched += 1
+            latest = _later(latest, record.get("Modified_Time"))
+            lead = to_lead(record)
+            if lead is None:
+                stats.skipped += 1
+            else:
+                leads.append(lead)
+        stats.upserted += await upsert_leads(session, leads, mirror=True)
+        # only once written, a failed page is read again on the next run
+        overlap.update(read)
+        if not more or latest is None:
+            break
+        rewound = _rewind(latest)
+        if cursor is not None and rewound <= datetime.fromisoformat(cursor):
+            # a full page within one second: step through it by offset
+            page += 1
+        else:
+            cursor = rewound.isoformat()
+            page = 1
+        _prune(overlap, rewound)
+
+    if stats.upserted:
+        await response_cache.invalidate("/api/crm/records/")
+    if latest and latest != since:
+        await save_checkpoint(session, module, latest)
+    stats.checkpoint = latest
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+class SyncWorker:
+    """Runs incremental syncs for the configured modules on an interval."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        session_factory: Callable[[], AsyncSession],
+        client: Optional[ZohoClient] = None,
+    ):
+        self.settings = settings
+        self.session_factory = session_factory
+        self.client = client or ZohoClient(settings)
+        self.last_run: List[SyncStats] = []
+        # per module, so boundary records are not counted again next run
+        self._overlap: Dict[str, Overlap] = {}
+
+    async def _sync(self, module: str, slots: asyncio.Semaphore) -> SyncStats:
+        async with slots, self.session_factory() as session:
+            stats = await sync_module(
+                self.client, session, module, self._overlap.setdefault(module, {})
+            )
+        logger.info(
+            "Zoho %s sync: %d records in %.2fs (%.1f records/s), checkpoint %s",
+            module,
+            stats.fetched,
+            stats.seconds,
+            stats.records_per_second,
+            stats.checkpoint,
+        )
+        return stats
+
+    async def run_once(self) -> List[SyncStats]:
+        # modules page independently, so they share the concurrency budget
+        slots = asyncio.Semaphore(self.settings.zoho_sync_concurrency)
+        results = await asyncio.gather(
+            *(self._sync(module, slots) for module in self.settings.zoho_sync_modules)
+        )
+        self.last_run = list(results)
+        return self.last_run
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except (ZohoError, httpx.HTTPError, SQLAlchemyError) as exc:
+                logger.warning("Zoho sync failed: %s", exc)
+            except Exception:
+                # anything else (bad JSON, unparseable timestamps) must not
+                # end the worker for the life of the process
+                logger.exception("Zoho sync failed")
+            await asyncio.sleep(self.settings.zoho_sync_interval)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import httpx
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Zoho returns at most 200 records per page
+PAGE_SIZE = 200
+MAX_RETRIES = 3
+
+
+class ZohoError(Exception):
+    pass
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", "60"))
+    except ValueError:
+        return 60.0
+
+
+class TokenBucket:
+    """Async token bucket sized to Zoho's per-minute API quota."""
+
+    def __init__(self, per_minute: int, capacity: Optional[int] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or max(1, per_minute // 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        # the lock keeps waiters in order so no caller starves
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class TokenCache:
+    """Caches the OAuth access token and refreshes it ahead of expiry."""
+
+    def __init__(
+        self, http: httpx.AsyncClient, settings: Settings, margin: float = 300
+    ):
+        self.http = http
+        self.settings = settings
+        self.margin = margin
+        self.token: Optional[str] = None
+        self.expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return (
+            self.token is not None and time.monotonic() < self.expires_at - self.margin
+        )
+
+    async def get(self) -> str:
+        if self._fresh():
+            return self.token
+        async with self._lock:
+            # another request may have refreshed while we waited
+            if not self._fresh():
+                await self._refresh()
+            return self.token
+
+    def invalidate(self) -> None:
+        self.token = None
+
+    async def _refresh(self) -> None:
+        response = await self.http.post(
+            self.settings.zoho_accounts_server.rstrip("/") + "/oauth/v2/token",
+            params={
+                "grant_type": "refresh_token",
+                "client_id": self.settings.zoho_client_id,
+                "client_secret": self.settings.zoho_client_secret,
+                "refresh_token": self.settings.zoho_refresh_token,
+            },
+        )
+        body = response.json() if response.content else {}
+        if response.status_code != 200 or "access_token" not in body:
+            raise ZohoError(
+                "token refresh failed: %s" % body.get("error", response.status_code)
+            )
+        self.token = body["access_token"]
+        self.expires_at = time.monotonic() + float(body.get("expires_in", 3600))
+
+
+class ZohoClient:
+    """Zoho CRM REST client sharing one connection pool, token and quota."""
+
+    def __init__(
+        self, settings: Settings, transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.settings = settings
+        self.http = httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.zoho_sync_concurrency,
+                max_keepalive_connections=settings.zoho_sync_concurrency,
+            ),
+        )
+        self.tokens = TokenCache(self.http, settings)
+        self.limiter = TokenBucket(settings.zoho_requests_per_minute)
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def _get(self, path: str, params: dict, headers: dict) -> httpx.Response:
+        url = self.settings.zoho_api_domain.rstrip("/") + path
+        for _ in range(MAX_RETRIES):
+            await self.limiter.acquire()
+            token = await self.tokens.get()
+            response = await self.http.get(
+                url,
+                params=params,
+                headers={**headers, "Authorization": "Zoho-oauthtoken " + token},
+            )
+            if response.status_code == 401:
+                self.tokens.invalidate()
+                continue
+            if response.status_code == 429:
+                # someone else spent the quota too, wait out the window
+                self.limiter.tokens = 0
+                delay = _retry_after(response)
+                logger.warning("Zoho quota exceeded, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                continue
+            return response
+        raise ZohoError("%s failed after %d attempts" % (path, MAX_RETRIES))
+
+    async def records(
+        self, module: str, page: int, modified_since: Optional[str] = None
+    ) -> Tuple[List[dict], bool]:
+        """One page of a module, oldest change first; returns (records, more)."""
+        headers = {"If-Modified-Since": modified_since} if modified_since else {}
+        response = await self._get(
+            "/crm/v2/" + module,
+            params={
+                "page": page,
+                "per_page": PAGE_SIZE,
+                "sort_by": "Modified_Time",
+                "sort_order": "asc",
+            },
+            headers=headers,
+        )
+        # 204 means no records, 304 nothing changed since the checkpoint
+        if response.status_code in (204, 304):
+            return [], False
+        if response.status_code != 200:
+            raise ZohoError(
+                "%s page %d: HTTP %d" % (module, page, response.status_code)
+            )
+        body = response.json()
+        return body.get("data", []), bool(body.get("info", {}).get("more_records"))
@@ -0,0 +1,561 @@
+"""Load test and latency benchmark for test-api.
+
+Boots the app under uvicorn against a throwaway SQLite database, seeds it,
+drives concurrent traffic at each route and compares p50/p95/p99 latency
+and requests per second with benchmarks/baseline.json.
+
+    python -m benchmarks.loadtest                      # run and compare
+    python -m benchmarks.loadtest --update-baseline    # record a new baseline
+    python -m benchmarks.loadtest --profile cprofile   # also profile the slowest routes
+
+The run exits non-zero when a route errors, misses the latency budget or
+regresses past the baseline tolerance. Baselines are machine specific and
+none is committed: the first --update-baseline on the machine that runs
+the comparison creates it.
+"""
+
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+import httpx
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional, cProfile needs nothing extra
+    Profiler = None
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+PROFILE_DIR = BENCH_DIR / "profiles"
+
+# KPI: critical operations answer within 200ms at WORKERS=4
+LATENCY_BUDGET_MS = 200.0
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_WORKERS = 4
+DEFAULT_CONCURRENCY = 8
+DEFAULT_REQUESTS = 500
+
+SEED_LEADS = 2000
+SEED_CAREGIVERS = 10000
+INGEST_BATCH = 50
+MATCH_BATCH = 10
+
+CERTIFICATIONS = ["cpr", "doula", "postpartum", "lactation", "newborn-care", "rn"]
+LANGUAGES = ["english", "spanish", "french", "arabic"]
+
+# (method, path, httpx request kwargs)
+Request = Tuple[str, str, dict]
+
+
+def _lead(rnd: random.Random) -> dict:
+    return {
+        "email": "bench-%d@example.com" % rnd.randrange(10**12),
+        "first_name": "Bench",
+        "last_name": "Lead",
+        "phone": "555-%04d" % rnd.randrange(10000),
+        "source": "loadtest",
+    }
+
+
+def _ndjson(rows: List[dict]) -> bytes:
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+def _place(rnd: random.Random) -> dict:
+    return {"latitude": 35 + rnd.random() * 1.5, "longitude": -81 + rnd.random() * 2}
+
+
+def _windows(rnd: random.Random, count: int) -> List[dict]:
+    windows = []
+    for _ in range(count):
+        start = rnd.randrange(0, 20)
+        windows.append(
+            {"day": rnd.randrange(7), "start_hour": start, "end_hour": start + 4}
+        )
+    return windows
+
+
+def caregivers(count: int, seed: int = 0) -> List[dict]:
+    rnd = random.Random(seed)
+    return [
+        dict(
+            id="caregiver-%d" % i,
+            certifications=rnd.sample(CERTIFICATIONS, 2),
+            languages=rnd.sample(LANGUAGES, 2),
+            availability=_windows(rnd, 2),
+            **_place(rnd),
+        )
+        for i in range(count)
+    ]
+
+
+def _root(rnd: random.Random) -> Request:
+    return "GET", "/", {}
+
+
+def _health(rnd: random.Random) -> Request:
+    return "GET", "/health", {}
+
+
+def _record(rnd: random.Random) -> Request:
+    # the seeded database is empty, so ids 1..SEED_LEADS exist
+    return "GET", "/api/crm/records/%d" % rnd.randint(1, SEED_LEADS), {}
+
+
+def _ingest(rnd: random.Random) -> Request:
+    body = _ndjson([_lead(rnd) for _ in range(INGEST_BATCH)])
+    return (
+        "POST",
+        "/api/crm/leads",
+        {
+            "content": body,
+            "headers": {"content-type": "application/x-ndjson"},
+        },
+    )
+
+
+def _match(rnd: random.Random) -> Request:
+    requests = [
+        dict(
+            id="request-%d" % i,
+            required_certifications=rnd.sample(CERTIFICATIONS, 1),
+            languages=rnd.sample(LANGUAGES, 1),
+            availability=_windows(rnd, 1),
+            **_place(rnd),
+        )
+        for i in range(MATCH_BATCH)
+    ]
+    return (
+        "POST",
+        "/api/matching/requests",
+        {"json": {"requests": requests, "top_k": 5}},
+    )
+
+
+# route name -> builder for one request, payloads are built before timing
+SCENARIOS: Dict[str, Callable[[random.Random], Request]] = {
+    "root": _root,
+    "health": _health,
+    "record": _record,
+    "ingest_leads": _ingest,
+    "match": _match,
+}
+
+
+@dataclass
+class RouteStats:
+    route: str
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    @classmethod
+    def from_latencies(
+        cls, route: str, latencies: List[float], errors: int, seconds: float
+    ) -> "RouteStats":
+        ordered = sorted(latencies)
+        return cls(
+            route=route,
+            requests=len(ordered),
+            errors=errors,
+            seconds=round(seconds, 3),
+            rps=round(len(ordered) / seconds, 1) if seconds else 0.0,
+            p50_ms=round(percentile(ordered, 50) * 1000, 2),
+            p95_ms=round(percentile(ordered, 95) * 1000, 2),
+            p99_ms=round(percentile(ordered, 99) * 1000, 2),
+        )
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    route: str,
+    requests: int,
+    concurrency: int,
+    seed: int = 0,
+) -> RouteStats:
+    """Send ``requests`` requests for one route, ``concurrency`` in flight."""
+    rnd = random.Random(seed)
+    pending = iter([SCENARIOS[route](rnd) for _ in range(requests)])
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        # every worker pulls from the same iterator until it runs dry
+        for method, path, kwargs in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return RouteStats.from_latencies(
+        route, latencies, errors, time.perf_counter() - started
+    )
+
+
+def compare(
+    results: List[RouteStats],
+    baseline: Optional[dict],
+    tolerance: float,
+    budget_ms: float = LATENCY_BUDGET_MS,
+) -> List[str]:
+    """Human readable failures; an empty list means the run passed."""
+    expected = (baseline or {}).get("routes", {})
+    failures = []
+    for stats in results:
+        if stats.errors:
+            failures.append(
+                "%s: %d of %d requests failed"
+                % (stats.route, stats.errors, stats.requests)
+            )
+        if stats.p95_ms > budget_ms:
+            failures.append(
+                "%s: p95 %.1fms is over the %.0fms budget"
+                % (stats.route, stats.p95_ms, budget_ms)
+            )
+        before = expected.get(stats.route)
+        if before is None:
+            continue
+        if stats.p95_ms > before["p95_ms"] * (1 + tolerance):
+            failures.append(
+                "%s: p95 %.1fms regressed from %.1fms"
+                % (stats.route, stats.p95_ms, before["p95_ms"])
+            )
+        if stats.rps < before["rps"] * (1 - tolerance):
+            failures.append(
+                "%s: %.1f req/s regressed from %.1f req/s"
+                % (stats.route, stats.rps, before["rps"])
+            )
+    return failures
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_env(workdir: Path, workers: int) -> Dict[str, str]:
+    """Environment for the app under test: fresh database, fixed caregiver pool."""
+    caregivers_file = workdir / "caregivers.json"
+    caregivers_file.write_text(json.dumps(caregivers(SEED_CAREGIVERS)))
+    return {
+        "DATABASE_URL": "",
+        "SQLITE_DB_PATH": str(workdir / "bench.db"),
+        "CAREGIVERS_FILE": str(caregivers_file),
+        "LOG_FILE": str(workdir / "logs" / "audit.log"),
+        "WORKERS": str(workers),
+        "ZOHO_SYNC_ENABLED": "false",
+    }
+
+
+# uvicorn log lines for a worker that failed to boot or died while serving
+WORKER_FAILURES = ("Application startup failed", "Child process [")
+WORKER_READY = "Application startup complete."
+
+
+def worker_failures(log: str) -> List[str]:
+    return [
+        line
+        for line in log.splitlines()
+        if any(mark in line for mark in WORKER_FAILURES)
+    ]
+
+
+@contextmanager
+def serve(env: Dict[str, str], workers: int, log_path: Path, timeout: float = 60.0):
+    """Run uvicorn in a subprocess and yield its base URL once every worker is up.
+
+    Raises RuntimeError if any worker fails to start, or dies before the
+    block exits, so numbers are never reported for fewer workers.
+    """
+    port = _free_port()
+    log_file = open(log_path, "wb")
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            # info, so each worker reports its startup
+            "--log-level",
+            "info",
+            "--no-access-log",
+        ],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    url = "http://127.0.0.1:%d" % port
+
+    def check(log: str) -> None:
+        failures = worker_failures(log)
+        if failures or process.poll() is not None:
+            raise RuntimeError(
+                "uvicorn worker failed:\n%s" % "\n".join(log.splitlines()[-20:])
+            )
+
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            log = log_path.read_text(errors="replace")
+            check(log)
+            if log.count(WORKER_READY) >= workers:
+                try:
+                    if httpx.get(url + "/health", timeout=1.0).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(
+                    "%d uvicorn workers did not start within %.0fs" % (workers, timeout)
+                )
+            time.sleep(0.2)
+        yield url
+        check(log_path.read_text(errors="replace"))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        log_file.close()
+
+
+async def seed(client: httpx.AsyncClient) -> None:
+    rnd = random.Random(-1)
+    rows = [
+        dict(_lead(rnd), email="seed-%d@example.com" % i) for i in range(SEED_LEADS)
+    ]
+    response = await client.post(
+        "/api/crm/leads",
+        content=_ndjson(rows),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    response.raise_for_status()
+
+
+async def run(
+    url: str, routes: List[str], requests: int, concurrency: int
+) -> List[RouteStats]:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        await seed(client)
+        results = []
+        for route in routes:
+            # warm connections, caches and lazy imports before timing
+            await drive(client, route, concurrency * 2, concurrency, seed=1)
+            results.append(await drive(client, route, requests, concurrency))
+        return results
+
+
+async def profile_routes(
+    routes: List[str],
+    env: Dict[str, str],
+    requests: int,
+    concurrency: int,
+    profiler: str,
+    out_dir: Path,
+) -> List[Path]:
+    """Replay routes in-process under a profiler and write one report per route."""
+    os.environ.update(env)
+    sys.path.insert(0, str(ROOT))
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    from app.main import app
+
+    async def inline(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    written = []
+    out_dir.mkdir(parents=True, exist_ok=True)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            # profilers only see their own thread, so run sync endpoints inline
+            with mock.patch("fastapi.routing.run_in_threadpool", inline):
+                for route in routes:
+                    await drive(client, route, concurrency, concurrency, seed=1)
+                    if profiler == "pyinstrument":
+                        session = Profiler(async_mode="enabled")
+                        session.start()
+                        await drive(client, route, requests, concurrency)
+                        session.stop()
+                        path = out_dir / ("%s.html" % route)
+                        path.write_text(session.output_html())
+                        (out_dir / ("%s.txt" % route)).write_text(session.output_text())
+                    else:
+                        session = cProfile.Profile()
+                        session.enable()
+                        await drive(client, route, requests, concurrency)
+                        session.disable()
+                        path = out_dir / ("%s.prof" % route)
+                        session.dump_stats(str(path))
+                        text = io.StringIO()
+                        pstats.Stats(session, stream=text).sort_stats(
+                            "cumulative"
+                        ).print_stats(40)
+                        (out_dir / ("%s.txt" % route)).write_text(text.getvalue())
+                    written.append(path)
+    return written
+
+
+def _table(results: List[RouteStats]) -> str:
+    lines = [
+        "%-14s %8s %7s %9s %9s %9s %9s"
+        % ("route", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms")
+    ]
+    for s in results:
+        lines.append(
+            "%-14s %8d %7d %9.1f %9.2f %9.2f %9.2f"
+            % (s.route, s.requests, s.errors, s.rps, s.p50_ms, s.p95_ms, s.p99_ms)
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--routes", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--requests", type=int, default=DEFAULT_REQUESTS, help="per route"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--tolerance", type=float, default=None, help="allowed regression, 0.25 = 25%%"
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=LATENCY_BUDGET_MS, help="p95 limit per route"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"])
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=2,
+        help="how many of the slowest routes to profile",
+    )
+    parser.add_argument("--profile-dir", type=Path, default=PROFILE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.profile == "pyinstrument" and Profiler is None:
+        parser.error("pyinstrument is not installed")
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = (baseline or {}).get("tolerance", DEFAULT_TOLERANCE)
+
+    if args.workers > (os.cpu_count() or 1):
+        print(
+            "warning: %d workers on %d CPUs, latencies will mostly measure "
+            "CPU contention" % (args.workers, os.cpu_count() or 1)
+        )
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = bench_env(Path(workdir), args.workers)
+        with serve(env, args.workers, Path(workdir) / "uvicorn.log") as url:
+            results = asyncio.run(
+                run(url, args.routes, args.requests, args.concurrency)
+            )
+        print(_table(results))
+
+        report = {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "tolerance": tolerance,
+            "routes": {s.route: asdict(s) for s in results},
+        }
+        if args.json:
+            args.json.write_text(json.dumps(report, indent=2) + "\n")
+
+        if args.profile:
+            slowest = sorted(results, key=lambda s: s.p95_ms, reverse=True)[
+                : args.profile_top
+            ]
+            written = asyncio.run(
+                profile_routes(
+                    [s.route for s in slowest],
+                    env,
+                    args.requests,
+                    args.concurrency,
+                    args.profile,
+                    args.profile_dir,
+                )
+            )
+            for path in written:
+                print("profile written to %s" % path)
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print("baseline written to %s" % args.baseline)
+        return 0
+
+    if baseline is None:
+        print(
+            "no baseline at %s, run with --update-baseline to record one"
+            % args.baseline
+        )
+    failures = compare(results, baseline, tolerance, args.budget_ms)
+    for failure in failures:
+        print("FAIL " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
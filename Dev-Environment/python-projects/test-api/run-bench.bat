@@ -0,0 +1,3 @@
+@echo off
+call venv\Scripts\activate.bat
+python -m benchmarks.loadtest %*
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import response_cache
+from app.config import get_settings
+from app.main import app
+
+
+@pytest.fixture
+def sqlite_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "")
+    monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "logs" / "audit.log"))
+    monkeypatch.setenv("CAREGIVERS_FILE", str(tmp_path / "caregivers.json"))
+    get_settings.cache_clear()
+    # cached responses belong to the previous test's database
+    asyncio.run(response_cache.invalidate("/"))
+    yield tmp_path
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def db_client(sqlite_env):
+    # entering the client runs the lifespan, which opens the pool
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.audit import AuditLog, AuditMiddleware, RingBuffer, RotatingFile
+from app.config import get_settings
+from app.main import app
+
+
+def test_records_are_audited_and_measured(sqlite_env):
+    with TestClient(app) as client:
+        client.get("/api/crm/records/42", headers={"x-actor": "nurse-7"})
+        client.get("/")
+        deadline = time.monotonic() + 5
+        body = ""
+        while "/api/crm/records/{lead_id}" not in body and time.monotonic() < deadline:
+            time.sleep(0.05)
+            body = client.get("/metrics").text
+    # leaving the client runs shutdown, which flushes the buffer
+
+    labels = 'method="GET",route="/api/crm/records/{lead_id}",status="404"'
+    assert "http_requests_total{%s}" % labels in body
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"}' in body
+    )
+    assert "audit_events_written_total" in body
+
+    with open(get_settings().log_file) as f:
+        events = [json.loads(line) for line in f]
+    access = [event for event in events if event["path"] == "/api/crm/records/42"]
+    assert access == [
+        {
+            "ts": access[0]["ts"],
+            "actor": "nurse-7",
+            "client": "testclient",
+            "method": "GET",
+            "path": "/api/crm/records/42",
+            "route": "/api/crm/records/{lead_id}",
+            "status": 404,
+            "duration_ms": access[0]["duration_ms"],
+        }
+    ]
+    assert not any(event["path"] == "/metrics" for event in events)
+
+
+def test_full_buffer_waits_instead_of_dropping():
+    async def run():
+        buffer = RingBuffer(capacity=2, batch_size=2)
+        await buffer.put("a")
+        await buffer.put("b")
+        blocked = asyncio.ensure_future(buffer.put("c"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert buffer.drain(1) == ["a"]
+        await asyncio.wait_for(blocked, 1)
+        return buffer.waits, buffer.drain(10)
+
+    waits, rest = asyncio.run(run())
+    assert waits == 1
+    assert rest == ["b", "c"]
+
+
+def test_rotation_keeps_every_line(tmp_path):
+    path = tmp_path / "app.log"
+    log = RotatingFile(str(path), max_bytes=100)
+    for i in range(10):
+        log.write(b"%02d" % i + b"x" * 37 + b"\n")
+    log.close()
+
+    files = sorted(tmp_path.iterdir())
+    assert len(files) > 1
+    assert all(f.stat().st_size <= 100 for f in files)
+    lines = sorted(line for f in files for line in f.read_bytes().splitlines())
+    assert [line[:2] for line in lines] == [b"%02d" % i for i in range(10)]
+
+
+def test_instrumentation_overhead_under_50us(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_FILE", str(tmp_path / "audit.log"))
+    get_settings.cache_clear()
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def send(message):
+        pass
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/crm/records/1",
+        "headers": [(b"host", b"test"), (b"x-actor", b"bench")],
+        "client": ("127.0.0.1", 5000),
+    }
+
+    async def timed(app, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            await app(scope, receive, send)
+        return (time.perf_counter() - started) / count
+
+    async def run():
+        audit = AuditLog()
+        await audit.start(get_settings())
+        wrapped = AuditMiddleware(endpoint, audit)
+        count = 5000
+        overhead = min(
+            [
+                await timed(wrapped, count) - await timed(endpoint, count)
+                for _ in range(3)
+            ]
+        )
+        await audit.stop()
+        return overhead, audit.written
+
+    overhead, written = asyncio.run(run())
+    get_settings.cache_clear()
+    assert written == 15000
+    assert overhead < 50e-6
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+from app.cache import (
+    CacheMiddleware,
+    CachedResponse,
+    LRUCache,
+    MemorySharedBackend,
+    ResponseCache,
+    etag_matches,
+    response_cache,
+)
+
+
+def _ingest(client, body):
+    return client.post(
+        "/api/crm/leads", content=body, headers={"content-type": "text/csv"}
+    )
+
+
+def test_root_answers_if_none_match_with_304(db_client):
+    first = db_client.get("/")
+    etag = first.headers["etag"]
+    again = db_client.get("/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+    assert first.headers["cache-control"] == "private, max-age=30"
+
+
+def test_record_cache_is_invalidated_by_writes(db_client):
+    _ingest(db_client, "email,first_name\nf@example.com,Fay\n")
+    first = db_client.get("/api/crm/records/1")
+    assert first.json()["first_name"] == "Fay"
+    assert first.headers["cache-control"] == "no-cache"
+    hits = response_cache.hits
+    assert db_client.get("/api/crm/records/1").headers["etag"] == first.headers["etag"]
+    assert response_cache.hits == hits + 1
+
+    _ingest(db_client, "email,first_name\nf@example.com,Faye\n")
+    changed = db_client.get(
+        "/api/crm/records/1", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert changed.status_code == 200
+    assert changed.json()["first_name"] == "Faye"
+
+
+def test_missing_record_is_not_cached(db_client):
+    assert db_client.get("/api/crm/records/99").status_code == 404
+    _ingest(db_client, "email\ng@example.com\n")
+    assert db_client.get("/api/crm/records/1").status_code == 200
+
+
+def test_write_during_render_is_not_cached_stale():
+    cache = ResponseCache(8)
+    row = {"name": "old"}
+
+    async def app(scope, receive, send):
+        body = row["name"].encode()
+        if body == b"old":
+            # a concurrent write commits after this request read the row
+            row["name"] = "new"
+            await cache.invalidate("/records/")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": body})
+
+    middleware = CacheMiddleware(app, cache, {"/records/": 60})
+
+    async def get():
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/records/1", "headers": []}
+        await middleware(scope, None, send)
+        return messages[-1]["body"]
+
+    async def scenario():
+        return await get(), await get(), await get()
+
+    assert asyncio.run(scenario()) == (b"old", b"new", b"new")
+    assert cache.hits == 1
+
+
+def test_lru_evicts_oldest_and_expires():
+    cache = LRUCache(maxsize=2)
+    entry = CachedResponse(body=b"{}", etag='"x"')
+    cache.set("a", entry, ttl=60)
+    cache.set("b", entry, ttl=60)
+    cache.get("a")
+    cache.set("c", entry, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") is entry
+    cache.set("d", entry, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is None
+    assert cache.evictions == 2
+
+
+def test_shared_backend_fills_other_workers():
+    shared = MemorySharedBackend()
+    one, two = ResponseCache(8, shared), ResponseCache(8, shared)
+    entry = CachedResponse(
+        body=b'{"a":1}', etag='"e"', headers=[(b"content-type", b"application/json")]
+    )
+
+    async def scenario():
+        await one.set("/api/crm/records/1", entry, 60)
+        filled = await two.get("/api/crm/records/1", 60)
+        await one.invalidate("/api/crm/records/")
+        return filled, await two.shared.get("/api/crm/records/1")
+
+    filled, after = asyncio.run(scenario())
+    assert filled == entry
+    assert after is None
+
+
+def test_etag_matching():
+    assert etag_matches('W/"a", "b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
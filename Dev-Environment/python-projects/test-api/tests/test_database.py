@@ -0,0 +1,75 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import get_settings
+from app.database import Base, create_schema, postgres_url
+from app.main import app
+
+
+def test_postgres_url_uses_asyncpg():
+    assert (
+        postgres_url("postgresql://localhost:5432/sabir_dev")
+        == "postgresql+asyncpg://localhost:5432/sabir_dev"
+    )
+    assert postgres_url("sqlite:///x.db") == "sqlite:///x.db"
+
+
+def test_health_reports_pool(db_client):
+    response = db_client.get("/health")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "healthy"
+    assert body["database"]["backend"] == "sqlite"
+    assert body["database"]["size"] == get_settings().db_pool_size
+
+
+def test_falls_back_to_sqlite_without_postgres(sqlite_env, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://localhost:1/missing")
+    get_settings.cache_clear()
+    with TestClient(app) as client:
+        body = client.get("/health").json()
+    assert body["database"]["backend"] == "sqlite"
+    assert (sqlite_env / "test.db").exists()
+
+
+def test_pool_follows_max_connections(monkeypatch):
+    monkeypatch.setenv("MAX_CONNECTIONS", "100")
+    monkeypatch.setenv("WORKERS", "4")
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    get_settings.cache_clear()
+    settings = get_settings()
+    get_settings.cache_clear()
+    assert settings.connections_per_worker == 25
+    assert settings.db_pool_size + settings.db_max_overflow == 25
+
+
+def test_create_schema_survives_worker_race(tmp_path, monkeypatch):
+    create_all = Base.metadata.create_all
+    calls = []
+
+    def racing_create_all(conn, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            # another worker creates the tables between check and create
+            create_all(conn)
+            raise OperationalError(
+                "CREATE TABLE leads", {}, "table leads already exists"
+            )
+        create_all(conn, **kwargs)
+
+    monkeypatch.setattr(Base.metadata, "create_all", racing_create_all)
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///" + str(tmp_path / "race.db"))
+        await create_schema(engine)
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync: inspect(sync).get_table_names())
+        await engine.dispose()
+        return tables
+
+    assert "leads" in asyncio.run(run())
+    assert len(calls) == 2
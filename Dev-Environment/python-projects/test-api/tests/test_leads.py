@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+from app.ingest import LINE_TOO_LONG, MAX_LINE_BYTES, iter_csv, iter_ndjson
+
+
+def _ndjson(rows):
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+def test_ingest_ndjson_reports_row_errors(db_client):
+    body = _ndjson(
+        [
+            {"email": "A@Example.com", "first_name": "Ada"},
+            {"email": "not-an-email"},
+            {"email": "b@example.com", "source": "Mailchimp"},
+        ]
+    )
+    body += "{broken\n"
+    response = db_client.post(
+        "/api/crm/leads?chunk_size=2",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["received"] == 4
+    assert result["upserted"] == 2
+    assert result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+
+
+def test_ingest_reports_invalid_utf8_lines(db_client):
+    body = b'\xef\xbb\xbf{"email":"a@b.co"}\n\xff\xfe\n{"email":"c@d.co"}\n'
+    response = db_client.post(
+        "/api/crm/leads",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["upserted"] == 2
+    assert result["failed"] == 1
+    assert result["errors"] == [{"row": 2, "errors": ["line is not valid UTF-8"]}]
+
+
+def test_ingest_csv_reports_malformed_rows(db_client):
+    # stray quotes in unquoted cells pair up across the line break
+    body = 'email,first_name\na@b.co,Ann"ie\nc@d.co,Cy"\ne@f.co,Eve\n'
+    response = db_client.post(
+        "/api/crm/leads", content=body, headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["upserted"] == 1
+    assert result["failed"] == 1
+    assert result["errors"][0]["errors"][0].startswith("malformed CSV row")
+
+
+def test_ingest_csv_treats_lone_cr_as_line_break(db_client):
+    for body in (
+        "email,first_name\ra@b.co,Ann\rc@d.co,Cy\r",
+        "email,first_name\na@b.co,Ann\nc@d.co,Foo\rBar\n",
+    ):
+        response = db_client.post(
+            "/api/crm/leads", content=body, headers={"content-type": "text/csv"}
+        )
+        assert response.status_code == 200
+        assert response.json()["upserted"] == 2
+    # "Bar" became a row of its own, without a valid email
+    assert response.json()["failed"] == 1
+
+
+def test_ingest_csv_upserts_on_email(db_client):
+    first = 'Email Address,First Name,Last Name\nc@example.com,Cara,"Smith\nJones"\n'
+    second = "email,first_name,last_name\nc@example.com,,Jones\n"
+    for body in (first, second):
+        response = db_client.post(
+            "/api/crm/leads", content=body, headers={"content-type": "text/csv"}
+        )
+        assert response.json()["upserted"] == 1
+    assert response.json()["failed"] == 0
+
+
+def test_ingest_rejects_unknown_content_type(db_client):
+    response = db_client.post(
+        "/api/crm/leads", content="{}", headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 415
+
+
+def test_iter_csv_handles_split_chunks():
+    text = (
+        "email,note\r\n"
+        'd@example.com,"multi\r\nline, ""quoted"""\r\n'
+        "e@example.com,plain\r\n"
+    )
+    data = text.encode()
+
+    async def chunks():
+        for i in range(0, len(data), 3):
+            yield data[i : i + 3]
+
+    async def collect():
+        return [row async for row in iter_csv(chunks())]
+
+    rows = asyncio.run(collect())
+    assert rows == [
+        (1, {"email": "d@example.com", "note": 'multi\r\nline, "quoted"'}),
+        (2, {"email": "e@example.com", "note": "plain"}),
+    ]
+
+
+def _collect(parse, data, size):
+    async def chunks():
+        for i in range(0, len(data), size):
+            yield data[i : i + size]
+
+    async def collect():
+        return [row async for row in parse(chunks())]
+
+    return asyncio.run(collect())
+
+
+def test_overlong_lines_are_skipped_not_buffered():
+    long_line = b'{"email": "' + b"x" * MAX_LINE_BYTES + b'"}\n'
+    data = b'{"email": "a@b.co"}\n' + long_line + b'{"email": "c@d.co"}\n'
+    for size in (7, 4096, len(data)):
+        rows = _collect(iter_ndjson, data, size)
+        assert [number for number, _ in rows] == [1, 2, 3]
+        assert rows[1][1] == LINE_TOO_LONG
+        assert rows[2][1] == {"email": "c@d.co"}
+    # no line break at all: reported once, the rest is dropped as it arrives
+    assert _collect(iter_ndjson, b"x" * (4 * MAX_LINE_BYTES), 4096) == [
+        (1, LINE_TOO_LONG)
+    ]
+
+
+def test_iter_csv_handles_crlf_split_between_chunks():
+    data = b'email,note\r\na@b.co,"x\r\ny"\r\nc@d.co,z\r\n'
+    for size in range(1, 8):
+        assert _collect(iter_csv, data, size) == [
+            (1, {"email": "a@b.co", "note": "x\r\ny"}),
+            (2, {"email": "c@d.co", "note": "z"}),
+        ]
@@ -0,0 +1,46 @@
+import asyncio
+
+import httpx
+
+from benchmarks.loadtest import RouteStats, compare, drive, percentile
+from app.main import app
+
+
+def _stats(route="root", errors=0, rps=100.0, p95_ms=50.0):
+    return RouteStats(route, 100, errors, 1.0, rps, 10.0, p95_ms, 60.0)
+
+
+def test_percentile_nearest_rank():
+    ordered = [float(i) for i in range(1, 101)]
+    assert percentile(ordered, 50) == 50.0
+    assert percentile(ordered, 95) == 95.0
+    assert percentile(ordered, 99) == 99.0
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions_and_budget():
+    baseline = {"routes": {"root": {"p95_ms": 40.0, "rps": 200.0}}}
+    assert compare([_stats(p95_ms=45.0, rps=180.0)], baseline, tolerance=0.25) == []
+
+    failures = compare([_stats(p95_ms=60.0, rps=100.0)], baseline, tolerance=0.25)
+    assert len(failures) == 2
+    assert "regressed" in failures[0] and "regressed" in failures[1]
+
+    assert compare([_stats(p95_ms=250.0)], None, tolerance=0.25, budget_ms=200.0)
+    assert compare([_stats(errors=3)], None, tolerance=0.25)
+
+
+def test_drive_reports_latencies(db_client):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await drive(client, "root", requests=20, concurrency=4)
+
+    stats = asyncio.run(run())
+    assert stats.requests == 20
+    assert stats.errors == 0
+    assert stats.rps > 0
+    assert 0 < stats.p50_ms <= stats.p95_ms <= stats.p99_ms
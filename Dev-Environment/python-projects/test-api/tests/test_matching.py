@@ -0,0 +1,237 @@
+import json
+import math
+import os
+import random
+import time
+
+import pytest
+
+from app.config import get_settings
+from app.main import app
+from app.matches import load_index
+from app.matching import EARTH_RADIUS_KM, WEIGHTS, CaregiverIndex
+from app.schemas import CaregiverIn, CareRequestIn
+
+MORNINGS = [{"day": day, "start_hour": 8, "end_hour": 12} for day in range(5)]
+CAREGIVERS = [
+    {
+        "id": "near",
+        "latitude": 35.2271,
+        "longitude": -80.8431,
+        "certifications": ["CPR", "Doula"],
+        "languages": ["English", "Spanish"],
+        "availability": MORNINGS,
+    },
+    {
+        "id": "farther",
+        "latitude": 35.30,
+        "longitude": -80.75,
+        "certifications": ["cpr", "doula"],
+        "languages": ["english"],
+        "availability": MORNINGS[:2],
+    },
+    {
+        "id": "uncertified",
+        "latitude": 35.2271,
+        "longitude": -80.8431,
+        "certifications": ["cpr"],
+        "languages": ["spanish"],
+        "availability": MORNINGS,
+    },
+    {
+        "id": "out-of-range",
+        "latitude": 36.07,
+        "longitude": -79.79,
+        "certifications": ["cpr", "doula"],
+        "languages": ["spanish"],
+        "availability": MORNINGS,
+    },
+]
+REQUEST = {
+    "id": "family-1",
+    "latitude": 35.23,
+    "longitude": -80.84,
+    "max_distance_km": 40,
+    "required_certifications": ["doula"],
+    "languages": ["spanish"],
+    "availability": MORNINGS,
+}
+
+
+def test_match_requires_loaded_caregivers(db_client):
+    if hasattr(app.state, "caregiver_index"):
+        del app.state.caregiver_index
+    response = db_client.post("/api/matching/requests", json={"requests": [REQUEST]})
+    assert response.status_code == 409
+
+
+def test_match_ranks_eligible_caregivers(db_client):
+    loaded = db_client.put("/api/matching/caregivers", json=CAREGIVERS)
+    assert loaded.json()["caregivers"] == 4
+
+    response = db_client.post(
+        "/api/matching/requests", json={"requests": [REQUEST], "top_k": 3}
+    )
+    assert response.status_code == 200
+    (result,) = response.json()["results"]
+    assert result["request_id"] == "family-1"
+    assert [match["caregiver_id"] for match in result["matches"]] == ["near", "farther"]
+    assert result["matches"][0]["availability_coverage"] == 1.0
+    assert result["matches"][1]["availability_coverage"] == 0.4
+
+
+def test_caregiver_pool_is_shared_through_the_file(db_client, sqlite_env):
+    db_client.put("/api/matching/caregivers", json=CAREGIVERS)
+    path = sqlite_env / "caregivers.json"
+    assert len(json.loads(path.read_text())) == 4
+
+    # another worker replaces the pool; this one picks it up on its next match
+    (sqlite_env / "other.json").write_text(json.dumps(CAREGIVERS[1:]))
+    os.replace(sqlite_env / "other.json", path)
+    response = db_client.post("/api/matching/requests", json={"requests": [REQUEST]})
+    (result,) = response.json()["results"]
+    assert [match["caregiver_id"] for match in result["matches"]] == ["farther"]
+
+
+def test_pool_upload_without_file_is_rejected_with_workers(db_client, monkeypatch):
+    monkeypatch.setenv("CAREGIVERS_FILE", "")
+    monkeypatch.setenv("WORKERS", "4")
+    get_settings.cache_clear()
+    response = db_client.put("/api/matching/caregivers", json=CAREGIVERS)
+    assert response.status_code == 409
+
+    monkeypatch.setenv("WORKERS", "1")
+    get_settings.cache_clear()
+    assert db_client.put("/api/matching/caregivers", json=CAREGIVERS).status_code == 200
+
+
+def test_load_index_from_file(tmp_path):
+    path = tmp_path / "caregivers.json"
+    path.write_text(json.dumps(CAREGIVERS))
+    index = load_index(str(path))
+    assert len(index) == 4
+    assert index.match([CareRequestIn(**REQUEST)])[0][0][0] == "near"
+
+
+def test_unknown_certification_matches_nobody():
+    index = CaregiverIndex([CaregiverIn(**caregiver) for caregiver in CAREGIVERS])
+    request = CareRequestIn(**dict(REQUEST, required_certifications=["night-nurse"]))
+    assert index.match([request]) == [[]]
+
+
+CERTS = ["cpr", "doula", "postpartum", "lactation", "newborn-care", "rn"]
+LANGUAGES = ["english", "spanish", "french", "arabic"]
+
+# (caregiver box, request box) as (lat, lon, lat span, lon span)
+SPREAD = ((35.0, -81.0, 1.5, 2.0), (35.0, -81.0, 1.5, 2.0))
+# one metro: everyone within 0.3 degrees of the centre, families near it
+CLUSTERED = ((34.9, -81.1, 0.6, 0.6), (35.15, -80.85, 0.1, 0.1))
+
+
+def _population(caregiver_count, request_count, boxes, seed=7):
+    rnd = random.Random(seed)
+
+    def windows():
+        start = rnd.randrange(0, 20)
+        return [{"day": rnd.randrange(7), "start_hour": start, "end_hour": start + 4}]
+
+    def place(box):
+        lat, lon, lat_span, lon_span = box
+        return {
+            "latitude": lat + rnd.random() * lat_span,
+            "longitude": lon + rnd.random() * lon_span,
+        }
+
+    caregivers = [
+        CaregiverIn(
+            id="c%d" % i,
+            certifications=rnd.sample(CERTS, 2),
+            languages=rnd.sample(LANGUAGES, 2),
+            availability=windows() + windows(),
+            **place(boxes[0]),
+        )
+        for i in range(caregiver_count)
+    ]
+    requests = [
+        CareRequestIn(
+            id="r%d" % i,
+            required_certifications=rnd.sample(CERTS, 1),
+            preferred_certifications=rnd.sample(CERTS, 1),
+            languages=rnd.sample(LANGUAGES, 1),
+            availability=windows(),
+            **place(boxes[1]),
+        )
+        for i in range(request_count)
+    ]
+    return caregivers, requests
+
+
+def _hours(windows):
+    return {w.day * 24 + h for w in windows for h in range(w.start_hour, w.end_hour)}
+
+
+def _reference(caregivers, request, top_k):
+    """Brute-force scoring, one pair at a time."""
+    found = []
+    wanted = _hours(request.availability)
+    for caregiver in caregivers:
+        if not set(request.required_certifications) <= set(caregiver.certifications):
+            continue
+        overlap = len(wanted & _hours(caregiver.availability))
+        coverage = overlap / len(wanted) if wanted else 1.0
+        lat1, lat2 = math.radians(request.latitude), math.radians(caregiver.latitude)
+        dlat = lat2 - lat1
+        dlon = math.radians(caregiver.longitude - request.longitude)
+        a = (
+            math.sin(dlat / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        if coverage == 0 or distance > request.max_distance_km:
+            continue
+        preferred = set(request.preferred_certifications)
+        score = (
+            WEIGHTS["availability"] * coverage
+            + WEIGHTS["distance"] * (1 - distance / request.max_distance_km)
+            + WEIGHTS["language"]
+            * bool(set(request.languages) & set(caregiver.languages))
+            + WEIGHTS["certifications"]
+            * len(preferred & set(caregiver.certifications))
+            / len(preferred)
+        )
+        found.append((score, caregiver.id))
+    found.sort(key=lambda item: -item[0])
+    return [caregiver_id for _, caregiver_id in found[:top_k]]
+
+
+@pytest.mark.parametrize("boxes", [SPREAD, CLUSTERED], ids=["spread", "clustered"])
+def test_match_agrees_with_brute_force(boxes):
+    caregivers, requests = _population(600, 80, boxes)
+    results = CaregiverIndex(caregivers).match(requests, top_k=5)
+    assert any(results)
+    for request, found in zip(requests, results):
+        assert [match[0] for match in found] == _reference(caregivers, request, 5)
+
+
+def test_request_near_cell_edge_reaches_full_radius():
+    index = CaregiverIndex([CaregiverIn(id="north", latitude=0, longitude=-80.8)])
+    # just under the top edge of its cell, caregiver 24.99 km due north
+    latitude = (math.floor(35.0 / index.cell_deg) + 1) * index.cell_deg - 1e-6
+    north = latitude + 24.99 / (2 * math.pi * EARTH_RADIUS_KM / 360)
+    index = CaregiverIndex([CaregiverIn(id="north", latitude=north, longitude=-80.8)])
+    request = CareRequestIn(
+        id="r", latitude=latitude, longitude=-80.8, max_distance_km=25
+    )
+    assert [match[0] for match in index.match([request])[0]] == ["north"]
+
+
+@pytest.mark.parametrize("boxes", [SPREAD, CLUSTERED], ids=["spread", "clustered"])
+def test_matches_ten_thousand_by_one_thousand_quickly(boxes):
+    caregivers, requests = _population(10000, 1000, boxes)
+
+    started = time.perf_counter()
+    results = CaregiverIndex(caregivers).match(requests, top_k=5)
+    elapsed = time.perf_counter() - started
+    assert len(results) == 1000
+    assert any(results)
+    assert elapsed < 1.0
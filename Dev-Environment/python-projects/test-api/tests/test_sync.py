@@ -0,0 +1,227 @@
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+
+from sqlalchemy import func, select
+
+from app import database
+from app.config import get_settings
+from app.models import Lead
+from app.sync import SyncWorker
+from app.zoho import TokenBucket, ZohoClient
+
+
+class MockZoho:
+    """In-process stand-in for the Zoho accounts and CRM APIs."""
+
+    def __init__(self, count):
+        self.records = [
+            self._record(i, "2025-08-0%dT10:00:00+05:30" % (1 + i % 5))
+            for i in range(count)
+        ]
+        self.token = None
+        self.token_requests = 0
+        self.requests = 0
+        # called with the request count before each page is served
+        self.on_page = None
+
+    @staticmethod
+    def _record(i, modified):
+        return {
+            "id": str(i),
+            "Email": "lead%d@example.com" % i,
+            "First_Name": "Lead%d" % i,
+            "Lead_Source": "Website",
+            "Modified_Time": modified,
+        }
+
+    def touch(self, i, modified):
+        self.records[i] = dict(self._record(i, modified), First_Name="Changed")
+
+    def handler(self, request):
+        if request.url.path == "/oauth/v2/token":
+            self.token_requests += 1
+            self.token = "token-%d" % self.token_requests
+            return httpx.Response(
+                200, json={"access_token": self.token, "expires_in": 3600}
+            )
+
+        self.requests += 1
+        if request.headers.get("Authorization") != "Zoho-oauthtoken %s" % self.token:
+            return httpx.Response(401, json={"code": "INVALID_TOKEN"})
+        if self.on_page is not None:
+            self.on_page(self.requests)
+        since = request.headers.get("If-Modified-Since")
+        records = sorted(
+            self.records, key=lambda r: datetime.fromisoformat(r["Modified_Time"])
+        )
+        if since:
+            records = [
+                r
+                for r in records
+                if datetime.fromisoformat(r["Modified_Time"])
+                > datetime.fromisoformat(since)
+            ]
+        page = int(request.url.params["page"])
+        size = int(request.url.params["per_page"])
+        data = records[(page - 1) * size : page * size]
+        if not data:
+            return httpx.Response(304 if since else 204)
+        more = page * size < len(records)
+        return httpx.Response(200, json={"data": data, "info": {"more_records": more}})
+
+
+def _run(sqlite_env, monkeypatch, zoho, scenario):
+    monkeypatch.setenv("ZOHO_REQUESTS_PER_MINUTE", "60000")
+    get_settings.cache_clear()
+    settings = get_settings()
+
+    async def main():
+        await database.init_engine(settings)
+        client = ZohoClient(settings, transport=httpx.MockTransport(zoho.handler))
+        worker = SyncWorker(settings, database.SessionLocal, client)
+        try:
+            return await scenario(worker)
+        finally:
+            await worker.aclose()
+            await database.dispose_engine()
+
+    return asyncio.run(main())
+
+
+def test_incremental_sync_uses_checkpoint(sqlite_env, monkeypatch):
+    zoho = MockZoho(450)
+
+    async def scenario(worker):
+        first = (await worker.run_once())[0]
+        zoho.touch(3, "2025-08-09T12:00:00+05:30")
+        second = (await worker.run_once())[0]
+        third = (await worker.run_once())[0]
+        return first, second, third
+
+    first, second, third = _run(sqlite_env, monkeypatch, zoho, scenario)
+    assert first.fetched == first.upserted == 450
+    assert first.checkpoint == "2025-08-05T10:00:00+05:30"
+    assert first.records_per_second > 0
+    assert second.fetched == 1
+    assert second.checkpoint == "2025-08-09T12:00:00+05:30"
+    assert third.fetched == 0
+    assert zoho.token_requests == 1
+
+
+def test_record_edited_mid_run_is_not_skipped(sqlite_env, monkeypatch):
+    zoho = MockZoho(450)
+
+    def edit_first_record(requests):
+        # after page 1 is served, lead 0 moves to the end of the ordering
+        if requests == 2:
+            zoho.touch(0, "2025-08-09T12:00:00+05:30")
+
+    zoho.on_page = edit_first_record
+
+    async def scenario(worker):
+        stats = (await worker.run_once())[0]
+        async with database.SessionLocal() as session:
+            count = await session.scalar(select(func.count()).select_from(Lead))
+            changed = await session.scalar(
+                select(Lead.first_name).where(Lead.email == "lead0@example.com")
+            )
+        return stats, count, changed
+
+    stats, count, changed = _run(sqlite_env, monkeypatch, zoho, scenario)
+    assert count == 450
+    assert changed == "Changed"
+    # 450 originals plus the edited copy of lead 0, boundary repeats excluded
+    assert stats.fetched == 451
+    assert stats.checkpoint == "2025-08-09T12:00:00+05:30"
+
+
+def test_record_modified_in_checkpoint_second_is_synced(sqlite_env, monkeypatch):
+    zoho = MockZoho(10)
+
+    async def scenario(worker):
+        await worker.run_once()
+        # modified after the first run read that second
+        zoho.records.append(zoho._record(10, "2025-08-05T10:00:00+05:30"))
+        stats = (await worker.run_once())[0]
+        async with database.SessionLocal() as session:
+            count = await session.scalar(select(func.count()).select_from(Lead))
+        return stats, count
+
+    stats, count = _run(sqlite_env, monkeypatch, zoho, scenario)
+    assert count == 11
+    # the records already read at the boundary are not counted again
+    assert stats.fetched == 1
+
+
+def test_sync_mirrors_status_and_cleared_fields(sqlite_env, monkeypatch):
+    zoho = MockZoho(5)
+
+    async def scenario(worker):
+        await worker.run_once()
+        zoho.touch(0, "2025-08-09T12:00:00+05:30")
+        zoho.records[0].update(First_Name=None, Lead_Status="Qualified")
+        await worker.run_once()
+        async with database.SessionLocal() as session:
+            return (
+                await session.execute(
+                    select(Lead.status, Lead.first_name, Lead.source).where(
+                        Lead.email == "lead0@example.com"
+                    )
+                )
+            ).one()
+
+    status, first_name, source = _run(sqlite_env, monkeypatch, zoho, scenario)
+    assert status == "Qualified"
+    assert first_name is None
+    assert source == "Website"
+
+
+def test_worker_survives_unexpected_errors(sqlite_env, monkeypatch, caplog):
+    zoho = MockZoho(5)
+    monkeypatch.setenv("ZOHO_SYNC_INTERVAL", "0")
+    zoho.records[2]["Modified_Time"] = "not a timestamp"
+
+    async def scenario(worker):
+        task = asyncio.ensure_future(worker.run_forever())
+        while zoho.requests < 3:
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    _run(sqlite_env, monkeypatch, zoho, scenario)
+    assert "Zoho sync failed" in caplog.text
+
+
+def test_expired_token_is_refreshed(sqlite_env, monkeypatch):
+    zoho = MockZoho(10)
+
+    async def scenario(worker):
+        await worker.run_once()
+        # the server revokes the token the client still has cached
+        zoho.token = "revoked"
+        zoho.records.append(zoho._record(10, "2025-08-09T00:00:00+00:00"))
+        return (await worker.run_once())[0]
+
+    stats = _run(sqlite_env, monkeypatch, zoho, scenario)
+    assert stats.fetched == 1
+    assert zoho.token_requests == 2
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(per_minute=600, capacity=1)
+
+    async def drain():
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # one token up front, then 10 per second
+    assert asyncio.run(drain()) >= 0.29